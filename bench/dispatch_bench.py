@@ -0,0 +1,88 @@
+"""
+Compares outbound dispatch with a new client per trigger (the previous
+behaviour) against the shared `HttpDispatcher`.
+
+Run from the repository root:
+
+    python -m bench.dispatch_bench --requests 1000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from bench.stub_server import StubServer
+from services.http_dispatcher import HttpDispatcher
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def run(
+    send: Callable[[], Awaitable[None]],
+    stub: StubServer,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    connections_before = stub.connections
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await send()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests_per_second": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "connections_per_1k": (stub.connections - connections_before) * 1000 / requests,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = StubServer(latency=args.latency)
+    await stub.start()
+
+    async def per_call_client() -> None:
+        async with httpx.AsyncClient() as client:
+            await client.post(stub.url, json="{}")
+
+    dispatcher = HttpDispatcher()
+    await dispatcher.start()
+
+    async def shared_dispatcher() -> None:
+        await dispatcher.request("POST", stub.url, json="{}")
+
+    results = {
+        "shared_dispatcher": await run(
+            shared_dispatcher, stub, args.requests, args.concurrency
+        ),
+        "client_per_trigger": await run(
+            per_call_client, stub, args.requests, args.concurrency
+        ),
+    }
+
+    await dispatcher.stop()
+    await stub.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
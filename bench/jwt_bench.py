@@ -0,0 +1,90 @@
+"""
+Microbenchmark of the bearer-token decode hot path.
+
+For HS256 and RS256, times one decode of the same token with:
+    - `per_call_key`: the key given as text, parsed on every call (the
+      previous behaviour)
+    - `preparsed_key`: the key parsed once, signature still verified
+    - `cached`: `jwt_utils.decode_access_token` with the token already verified
+
+Run from the repository root:
+
+    python -m bench.jwt_bench --iterations 5000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+import jwt_utils
+
+
+def per_op_us(fn: Callable[[], object], iterations: int) -> float:
+    fn()  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def rsa_pem_pair() -> Dict[str, str]:
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return {
+        "private": private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode(),
+        "public": private.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        .decode(),
+    }
+
+
+def bench_algorithm(
+    algorithm: str, signing_key: str, verification_key: str, iterations: int
+) -> Dict[str, float]:
+    claims = {"sub": "bench", "exp": datetime.utcnow() + timedelta(hours=1)}
+    token = jwt.encode(claims, signing_key, algorithm=algorithm)
+    parsed_key = jwk.construct(verification_key, algorithm)
+
+    # Point jwt_utils at this algorithm and key for the cached path
+    jwt_utils.ALGORITHM = algorithm
+    jwt_utils._verification_key = parsed_key
+    jwt_utils._verified_tokens.clear()
+
+    return {
+        "per_call_key_us": per_op_us(
+            lambda: jwt.decode(token, verification_key, algorithms=[algorithm]),
+            iterations,
+        ),
+        "preparsed_key_us": per_op_us(
+            lambda: jwt.decode(token, parsed_key, algorithms=[algorithm]), iterations
+        ),
+        "cached_us": per_op_us(lambda: jwt_utils.decode_access_token(token), iterations),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    rsa_keys = rsa_pem_pair()
+    results = {
+        "HS256": bench_algorithm("HS256", "bench-secret", "bench-secret", args.iterations),
+        "RS256": bench_algorithm(
+            "RS256", rsa_keys["private"], rsa_keys["public"], args.iterations
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    main(parser.parse_args())
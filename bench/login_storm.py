@@ -0,0 +1,122 @@
+"""
+Latency of an unrelated endpoint while a burst of logins is being verified.
+
+Compares bcrypt run inline in the handler (the previous behaviour) against
+the bounded hashing pool in `jwt_utils`. A probe is due on `/health` every
+`--probe-interval` seconds during the storm; its p99 is how long any other
+request on the worker would have stalled. Everything runs in-process on one
+event loop, without a database.
+
+Run from the repository root:
+
+    python -m bench.login_storm --logins 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+
+import jwt_utils
+from bench.dispatch_bench import percentile
+from jwt_utils import PasswordHasher, PasswordHasherBusy
+
+PASSWORD = "correct horse battery staple"
+
+
+def build_app(hashed: str, hasher: PasswordHasher) -> FastAPI:
+    app = FastAPI()
+
+    @app.exception_handler(PasswordHasherBusy)
+    async def busy(request, exc) -> JSONResponse:
+        return JSONResponse(status_code=503, content={}, headers={"Retry-After": "1"})
+
+    @app.get("/health")
+    async def health() -> Dict[str, str]:
+        return {"status": "OK"}
+
+    @app.post("/login/inline")
+    async def login_inline() -> Dict[str, bool]:
+        if not jwt_utils.pwd_context.verify(PASSWORD, hashed):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.post("/login/pooled")
+    async def login_pooled() -> Dict[str, bool]:
+        verified, _ = await hasher.run(jwt_utils.pwd_context.verify_and_update, PASSWORD, hashed)
+        if not verified:
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    return app
+
+
+async def storm(
+    client: httpx.AsyncClient, path: str, args: argparse.Namespace
+) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    statuses: Dict[int, int] = {}
+    probes: List[float] = []
+    done = asyncio.Event()
+
+    async def login() -> None:
+        async with semaphore:
+            response = await client.post(path)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def probe() -> None:
+        # Latency is measured from when each probe was due, not when it was
+        # sent: a blocked loop delays the sending too
+        due = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.get("/health")
+            probes.append(time.perf_counter() - due)
+            due += args.probe_interval
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+
+    return {
+        "logins_per_second": statuses.get(200, 0) / elapsed,
+        "shed_503": statuses.get(503, 0),
+        "health_probes": len(probes),
+        "health_p50_ms": percentile(probes, 0.50) * 1000,
+        "health_p99_ms": percentile(probes, 0.99) * 1000,
+        "health_max_ms": max(probes) * 1000,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    hashed = jwt_utils.pwd_context.hash(PASSWORD)
+    hasher = PasswordHasher(args.workers, args.max_queue)
+    app = build_app(hashed, hasher)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {
+            "bcrypt_rounds": jwt_utils.BCRYPT_ROUNDS,
+            "inline": await storm(client, "/login/inline", args),
+            "pooled": await storm(client, "/login/pooled", args),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=jwt_utils.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--max-queue", type=int, default=jwt_utils.PASSWORD_HASH_MAX_QUEUE)
+    asyncio.run(main(parser.parse_args()))
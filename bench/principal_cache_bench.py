@@ -0,0 +1,117 @@
+"""
+Requests per second on `GET /events/all` with and without the principal cache.
+
+Drives the real app in-process against the database at DATABASE_URL (a
+scratch database migrated with `python migrate.py`): registers a user,
+creates a few events, then fetches them repeatedly with the cache off and on.
+
+Run from the repository root:
+
+    python -m bench.principal_cache_bench --requests 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+from bench.dispatch_bench import percentile
+from db.database import engine
+from main import app
+from services.principal_cache import PRINCIPAL_CACHE_TTL_SECONDS, principal_cache
+
+
+async def run(
+    client: httpx.AsyncClient, headers: Dict[str, str], requests: int, concurrency: int
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get("/events/all", headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests_per_second": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine.echo = False  # SQL logging would dominate the measurement
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        user_name = f"bench_{uuid.uuid4().hex[:8]}"
+        password = "bench-password"
+        response = await client.post(
+            "/auth/register",
+            json={
+                "user_name": user_name,
+                "name": "Bench User",
+                "email": f"{user_name}@example.com",
+                "password": password,
+            },
+        )
+        response.raise_for_status()
+        response = await client.post(
+            "/auth/login", data={"username": user_name, "password": password}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for i in range(args.events):
+            response = await client.post(
+                "/events/create",
+                headers=headers,
+                json={
+                    "name": f"bench event {i}",
+                    "event_type": "FIXED_TIME",
+                    "destination": "http://localhost/",
+                    "method_type": "GET",
+                    "is_test": True,
+                },
+            )
+            response.raise_for_status()
+
+        # Warm the connection pool before measuring
+        await run(client, headers, args.concurrency, args.concurrency)
+
+        principal_cache.ttl = 0
+        without_cache = await run(client, headers, args.requests, args.concurrency)
+
+        principal_cache.ttl = PRINCIPAL_CACHE_TTL_SECONDS or 60
+        await principal_cache.start()
+        while not principal_cache.enabled:
+            await asyncio.sleep(0.01)
+        with_cache = await run(client, headers, args.requests, args.concurrency)
+        stats = principal_cache.stats()
+        await principal_cache.stop()
+
+    await engine.dispose()
+    print(
+        json.dumps(
+            {"without_cache": without_cache, "with_cache": with_cache, "cache": stats},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--events", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
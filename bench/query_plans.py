@@ -0,0 +1,192 @@
+"""
+Checks that the hot event and log queries are planned as index scans.
+
+Seeds synthetic users, events and logs into the database at DATABASE_URL
+(use a scratch database migrated with `python migrate.py`), runs ANALYZE,
+then EXPLAINs each query and fails if it scans `events` or `logs`
+sequentially or does not use the index it was designed for.
+
+Run from the repository root:
+
+    python -m bench.query_plans --seed --users 1000 --events-per-user 20 --logs 1000000
+    python -m bench.query_plans            # re-check against existing data
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Select, func, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from db.database import DATABASE_URL
+from db.models.event_model import Event
+from db.models.log_model import Log
+
+# Imported so the mappers can resolve Event.creator, which names it as a string
+from db.models.user_model import User  # noqa: F401
+
+# Tables large enough that a sequential scan on them is a regression
+HOT_TABLES = {"events", "logs"}
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO users (user_name, name, email, password, role)
+    SELECT :tag || '_' || g, 'Bench User', :tag || '_' || g || '@bench.local', '-', 'USER'
+    FROM generate_series(1, :users) AS g
+    """,
+    """
+    INSERT INTO events (
+        creator_id, name, event_type, destination, method_type,
+        interval_minutes, next_run_at
+    )
+    SELECT u.id, CAST(:tag AS text), 'INTERVAL', 'http://localhost/', 'GET', 60,
+           now() + random() * interval '1 hour'
+    FROM users AS u CROSS JOIN generate_series(1, :events_per_user)
+    WHERE u.user_name LIKE CAST(:tag AS text) || '\\_%'
+    """,
+    """
+    INSERT INTO logs (event_id, response, response_status_code, timestamp, status)
+    SELECT e.ids[1 + g % e.n], 'ok', 200, now() - random() * interval '30 days', 'ACTIVE'
+    FROM generate_series(1, :logs) AS g,
+         (SELECT array_agg(id) AS ids, count(*) AS n FROM events WHERE name = :tag) AS e
+    """,
+)
+
+
+def hot_queries(user_id: int, event_id: int) -> List[Tuple[str, Select, Optional[str]]]:
+    """The queries behind the event and log endpoints, with the index each should use."""
+    cursor = (datetime.utcnow() - timedelta(days=1), 2**31 - 1)
+    newest_first = (Log.timestamp.desc(), Log.id.desc())
+
+    return [
+        (
+            "get_all_events",
+            select(Event).where(Event.creator_id == user_id).order_by(Event.id),
+            "ix_events_creator_id_id",
+        ),
+        (
+            "event_ownership_check",
+            select(Event.id).where(Event.id == event_id, Event.creator_id == user_id),
+            None,
+        ),
+        (
+            "logs_by_event_page",
+            select(Log)
+            .where(Log.event_id == event_id)
+            .order_by(*newest_first)
+            .limit(101),
+            "ix_logs_event_id_timestamp_id",
+        ),
+        (
+            "logs_by_event_next_page",
+            select(Log)
+            .where(Log.event_id == event_id, tuple_(Log.timestamp, Log.id) < cursor)
+            .order_by(*newest_first)
+            .limit(101),
+            "ix_logs_event_id_timestamp_id",
+        ),
+        (
+            "logs_by_event_count",
+            select(func.count()).select_from(Log).where(Log.event_id == event_id),
+            "ix_logs_event_id_timestamp_id",
+        ),
+        (
+            "logs_by_user_page",
+            select(Log)
+            .join(Event, Event.id == Log.event_id)
+            .where(Event.creator_id == user_id)
+            .order_by(*newest_first)
+            .limit(101),
+            None,
+        ),
+        (
+            "scheduler_due_events",
+            select(Event.id)
+            .where(Event.next_run_at <= datetime.utcnow())
+            .order_by(Event.next_run_at)
+            .limit(100),
+            "ix_events_next_run_at",
+        ),
+    ]
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def seed(conn: AsyncConnection, args: argparse.Namespace) -> None:
+    params = {
+        "tag": f"bench_{uuid.uuid4().hex[:8]}",
+        "users": args.users,
+        "events_per_user": args.events_per_user,
+        "logs": args.logs,
+    }
+    for statement in SEED_STATEMENTS:
+        await conn.execute(text(statement), params)
+    await conn.commit()
+
+
+async def main(args: argparse.Namespace) -> int:
+    engine = create_async_engine(DATABASE_URL)
+
+    async with engine.connect() as conn:
+        if args.seed:
+            await seed(conn, args)
+        await conn.execute(text("ANALYZE"))
+
+        # Sample the most recent event, so its owner has a typical number of events
+        row = (
+            await conn.execute(select(Event.id, Event.creator_id).order_by(Event.id.desc()))
+        ).first()
+        if row is None:
+            print("No events found, run with --seed first", file=sys.stderr)
+            return 1
+
+        results = {}
+        failed = False
+        for name, query, expected_index in hot_queries(row.creator_id, row.id):
+            sql = query.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+            plan = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = list(plan_nodes(plan[0]["Plan"]))
+
+            seq_scans = sorted(
+                node["Relation Name"]
+                for node in nodes
+                if node["Node Type"] == "Seq Scan" and node["Relation Name"] in HOT_TABLES
+            )
+            indexes = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+            ok = not seq_scans and (expected_index is None or expected_index in indexes)
+            failed = failed or not ok
+
+            results[name] = {
+                "ok": ok,
+                "expected_index": expected_index,
+                "indexes": indexes,
+                "seq_scans": seq_scans,
+                "estimated_cost": plan[0]["Plan"]["Total Cost"],
+            }
+
+    await engine.dispose()
+    print(json.dumps(results, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", action="store_true", help="Insert synthetic data first")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--events-per-user", type=int, default=20)
+    parser.add_argument("--logs", type=int, default=1_000_000)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,337 @@
+"""
+End-to-end benchmark of the API hot paths.
+
+Starts `main.app` in-process (lifespan included, so the scheduler runs)
+against a local Postgres, with `StubServer` as the webhook target, and
+drives each scenario at every concurrency level:
+
+    login        POST /auth/login
+    events_all   GET /events/all
+    trigger      POST /events/trigger/{id}
+    logs         GET /logs/?limit=100
+    scheduler    ONE_TIME events created through the API, fired by the scheduler
+
+Throughput, p50/p95/p99 latency and response status counts go to a JSON file
+stamped with the git commit. Pass an earlier file as `--baseline` to print the
+change per scenario.
+
+The database comes from DATABASE_URL (a scratch database; it is migrated to
+head first). Without a Postgres server at hand, `--pgserver DIR` starts a
+throwaway one from the `pgserver` package (pip install pgserver) in DIR.
+
+Run from the repository root:
+
+    python -m bench.run --pgserver /tmp/bench-pg --concurrency 1,10,50
+    python -m bench.run --output new.json --baseline old.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+from dotenv import load_dotenv
+
+from bench.dispatch_bench import percentile
+from bench.stub_server import StubServer
+
+# Applied before the app is imported, unless set in the environment or .env
+BENCH_ENV = {
+    "DB_PROFILE": "bench",
+    "SCHEDULER_ENABLED": "true",
+    "SCHEDULER_MODE": "local",
+    "LOG_RETENTION_ENABLED": "false",
+    "SECRET_KEY": "bench-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+}
+
+SCENARIOS = ("login", "events_all", "trigger", "logs", "scheduler")
+
+
+def summarize(latencies: List[float], statuses: Dict[int, int], elapsed: float) -> Dict[str, Any]:
+    return {
+        "requests": len(latencies),
+        "throughput_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def measure(
+    call: Callable[[int], Awaitable[httpx.Response]], requests: int, concurrency: int
+) -> Dict[str, Any]:
+    """Runs `call(i)` for i in range(requests), at most `concurrency` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await call(i)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+async def measure_scheduler(
+    client: httpx.AsyncClient,
+    headers: Dict[str, str],
+    destination: str,
+    events: int,
+    concurrency: int,
+    timeout: float,
+) -> Dict[str, Any]:
+    """Creates ONE_TIME events (due immediately) and waits until all have fired."""
+    from services.scheduler_service import LagStats, scheduler
+
+    scheduler.lag = LagStats()
+    body = {
+        "name": "bench one-time",
+        "event_type": "ONE_TIME",
+        "destination": destination,
+        "method_type": "POST",
+        "payload": "{}",
+        "is_test": True,
+    }
+    create = await measure(
+        lambda i: client.post("/events/create", headers=headers, json=body),
+        events,
+        concurrency,
+    )
+
+    start = time.perf_counter()
+    deadline = start + timeout
+    while scheduler.lag.fired + scheduler.lag.failed < events and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+
+    lag = scheduler.lag.snapshot()
+    return {
+        "events": events,
+        "fired": lag["fired"],
+        "failed": lag["failed"],
+        "create_throughput_per_second": create["throughput_per_second"],
+        "lag_p50_ms": lag["lag_p50_seconds"] * 1000,
+        "lag_p95_ms": lag["lag_p95_seconds"] * 1000,
+        "lag_p99_ms": lag["lag_p99_seconds"] * 1000,
+    }
+
+
+async def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    from db.database import engine, pool_stats
+    from main import app
+
+    stub = StubServer(latency=args.stub_latency, error_rate=args.stub_error_rate)
+    await stub.start()
+
+    results: Dict[str, Dict[str, Any]] = {name: {} for name in args.scenarios}
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=60
+        ) as client:
+            user_name = f"bench_{uuid.uuid4().hex[:8]}"
+            password = "bench-password"
+            response = await client.post(
+                "/auth/register",
+                json={
+                    "user_name": user_name,
+                    "name": "Bench User",
+                    "email": f"{user_name}@example.com",
+                    "password": password,
+                },
+            )
+            response.raise_for_status()
+
+            async def login(i: int) -> httpx.Response:
+                return await client.post(
+                    "/auth/login", data={"username": user_name, "password": password}
+                )
+
+            response = await login(0)
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            # Daily interval events: triggered by hand, never due during the run
+            event_ids = []
+            for i in range(args.events):
+                response = await client.post(
+                    "/events/create",
+                    headers=headers,
+                    json={
+                        "name": f"bench event {i}",
+                        "event_type": "INTERVAL",
+                        "interval_minutes": 1440,
+                        "destination": stub.url,
+                        "method_type": "POST",
+                        "payload": "{}",
+                        "is_test": True,
+                    },
+                )
+                response.raise_for_status()
+                event_ids.append(response.json()["id"])
+
+            calls = {
+                "login": (login, args.login_requests),
+                "events_all": (
+                    lambda i: client.get("/events/all", headers=headers),
+                    args.requests,
+                ),
+                "trigger": (
+                    lambda i: client.post(
+                        f"/events/trigger/{event_ids[i % len(event_ids)]}", headers=headers
+                    ),
+                    args.requests,
+                ),
+                "logs": (
+                    lambda i: client.get("/logs/", headers=headers, params={"limit": 100}),
+                    args.requests,
+                ),
+            }
+
+            for concurrency in args.concurrency:
+                for name in args.scenarios:
+                    if name == "scheduler":
+                        outcome = await measure_scheduler(
+                            client,
+                            headers,
+                            stub.url,
+                            args.scheduler_events,
+                            concurrency,
+                            args.scheduler_timeout,
+                        )
+                    else:
+                        call, requests = calls[name]
+                        outcome = await measure(call, requests, concurrency)
+
+                    results[name][str(concurrency)] = outcome
+                    print(f"{name} @ {concurrency}: {json.dumps(outcome)}", file=sys.stderr)
+
+            pool = pool_stats()
+
+    await stub.stop()
+    await engine.dispose()
+    return {"scenarios": results, "pool": pool}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Prints throughput and p99 of each scenario relative to a baseline run."""
+    for name, levels in current["scenarios"].items():
+        for concurrency, outcome in levels.items():
+            before = baseline.get("scenarios", {}).get(name, {}).get(concurrency)
+            if not before:
+                continue
+            for metric in ("throughput_per_second", "p99_ms", "lag_p99_ms"):
+                if metric in outcome and before.get(metric):
+                    change = (outcome[metric] / before[metric] - 1) * 100
+                    print(f"{name} @ {concurrency} {metric}: {change:+.1f}%")
+
+
+def start_pgserver(directory: str) -> str:
+    try:
+        import pgserver
+    except ImportError:
+        sys.exit("--pgserver needs the `pgserver` package: pip install pgserver")
+
+    server = pgserver.get_server(directory, cleanup_mode=None)
+    if not server.psql("SELECT 1 FROM pg_database WHERE datname = 'bench'").count("1 row"):
+        server.psql("CREATE DATABASE bench")
+    return f"postgresql+asyncpg://postgres@/bench?host={directory}"
+
+
+def main(args: argparse.Namespace) -> None:
+    load_dotenv()
+    if args.pgserver:
+        os.environ["DATABASE_URL"] = start_pgserver(args.pgserver)
+    for name, value in BENCH_ENV.items():
+        os.environ.setdefault(name, value)
+
+    # Migrations run their own event loop, so before the suite's
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config("alembic.ini"), "head")
+
+    started_at = datetime.utcnow()
+    outcome = asyncio.run(run_suite(args))
+
+    report = {
+        "commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "login_requests": args.login_requests,
+            "events": args.events,
+            "scheduler_events": args.scheduler_events,
+            "stub_latency": args.stub_latency,
+            "stub_error_rate": args.stub_error_rate,
+            "env": {
+                name: os.environ.get(name)
+                for name in ("DB_PROFILE", "SCHEDULER_MODE", "LOG_WRITER_ENABLED", "BCRYPT_ROUNDS")
+            },
+        },
+        **outcome,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 10, 50],
+        help="Comma-separated concurrency levels",
+    )
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help=f"Comma-separated subset of {','.join(SCENARIOS)}",
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--login-requests", type=int, default=50)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--scheduler-events", type=int, default=500)
+    parser.add_argument("--scheduler-timeout", type=float, default=60.0)
+    parser.add_argument("--stub-latency", type=float, default=0.005)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--pgserver", metavar="DIR")
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--baseline", metavar="FILE")
+    main(parser.parse_args())
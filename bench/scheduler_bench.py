@@ -0,0 +1,206 @@
+"""
+Exactly-once and throughput scaling of the leased scheduler across workers.
+
+For every worker count, seeds --events ONE_TIME events, each posting to its
+own path of a `StubServer`, starts that many worker processes running a
+leased `Scheduler` (as uvicorn workers would), makes all events due at once
+and waits until every one has completed. Reports the fire throughput, and
+per event the webhook requests received and logs written: anything other
+than exactly one of each is a duplicate or a miss.
+
+Seeds one user into the database at DATABASE_URL (a scratch database
+migrated with `python migrate.py`: the workers fire any event due in it) and
+deletes it, with its events and logs, afterwards. Each worker opens up to
+--pool-size connections, which must fit in the server's max_connections.
+
+Run from the repository root:
+
+    python -m bench.scheduler_bench --workers 1,2,4 --events 2000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict
+
+from sqlalchemy import delete, func, select, text, update
+
+from bench.stub_server import StubServer
+from db.database import async_session_maker, engine
+from db.models.event_model import Event
+from db.models.log_model import Log
+from db.models.user_model import User
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO users (user_name, name, email, password, role)
+    SELECT tag, 'Bench User', tag || '@bench.local', '-', 'USER' FROM CAST(:tag AS text) AS tag
+    """,
+    """
+    INSERT INTO events (
+        creator_id, name, event_type, destination, method_type, payload, is_test,
+        created_at, updated_at
+    )
+    SELECT u.id, 'bench event ' || g, 'ONE_TIME', '-', 'POST', '{}', true, now(), now()
+    FROM users AS u CROSS JOIN generate_series(1, :events) AS g
+    WHERE u.user_name = :tag
+    """,
+    # Each event posts to its own path, so the stub counts fires per event
+    """
+    UPDATE events SET destination = :url || '/' || events.id
+    FROM users
+    WHERE users.id = events.creator_id AND users.user_name = :tag
+    """,
+)
+
+
+async def worker(args: argparse.Namespace) -> None:
+    """One worker process, started like the app's lifespan, running until stdin closes."""
+    from services.http_dispatcher import http_dispatcher
+    from services.log_writer import LOG_WRITER_ENABLED, log_writer
+    from services.scheduler_service import Scheduler
+
+    engine.echo = False
+    scheduler = Scheduler(
+        mode="leased", node_id=f"bench-{os.getpid()}", max_concurrency=args.concurrency
+    )
+    await http_dispatcher.start()
+    if LOG_WRITER_ENABLED:
+        await log_writer.start()
+    await scheduler.start()
+    print("ready", flush=True)
+
+    await asyncio.to_thread(sys.stdin.read)
+
+    await scheduler.stop()
+    await log_writer.stop()
+    await http_dispatcher.stop()
+    await engine.dispose()
+    print(json.dumps(scheduler.lag.snapshot()), flush=True)
+
+
+async def run(args: argparse.Namespace, workers: int, stub: StubServer) -> Dict[str, Any]:
+    tag = f"schedbench_{uuid.uuid4().hex[:8]}"
+    stub.paths.clear()
+
+    async with async_session_maker() as db:
+        for statement in SEED_STATEMENTS:
+            await db.execute(text(statement), {"tag": tag, "events": args.events, "url": stub.url})
+        await db.commit()
+        user_id = await db.scalar(select(User.id).where(User.user_name == tag))
+        event_ids = (await db.scalars(select(Event.id).where(Event.creator_id == user_id))).all()
+
+    env = {
+        **os.environ,
+        "DB_PROFILE": os.getenv("DB_PROFILE", "bench"),
+        "SCHEDULER_ENABLED": "false",  # The workers run their own
+        "SCHEDULER_POLL_SECONDS": str(args.poll),
+        "DB_POOL_SIZE": str(args.pool_size),
+    }
+    processes = [
+        await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "bench.scheduler_bench", "--worker",
+            "--concurrency", str(args.concurrency),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        for _ in range(workers)
+    ]
+
+    try:
+        for process in processes:
+            if await process.stdout.readline() != b"ready\n":
+                raise RuntimeError("A scheduler worker failed to start")
+
+        pending = select(func.count()).where(
+            Event.creator_id == user_id, Event.next_run_at.isnot(None)
+        )
+        async with async_session_maker() as db:
+            await db.execute(
+                update(Event)
+                .where(Event.creator_id == user_id)
+                .values(next_run_at=func.timezone("utc", func.now()))
+            )
+            await db.commit()
+            start = time.perf_counter()
+
+            deadline = start + args.timeout
+            while await db.scalar(pending) and time.perf_counter() < deadline:
+                await db.rollback()  # Fresh snapshot per poll
+                await asyncio.sleep(0.05)
+            elapsed = time.perf_counter() - start
+            left = await db.scalar(pending)
+    finally:
+        lags = []
+        for process in processes:
+            process.stdin.close()
+            out, _ = await process.communicate()
+            if out.strip():
+                lags.append(json.loads(out.strip().splitlines()[-1]))
+
+    async with async_session_maker() as db:
+        logged = dict(
+            (
+                await db.execute(
+                    select(Log.event_id, func.count())
+                    .where(Log.event_id.in_(event_ids))
+                    .group_by(Log.event_id)
+                )
+            ).all()
+        )
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+    fired = [stub.paths[f"/hook/{event_id}"] for event_id in event_ids]
+    logs = [logged.get(event_id, 0) for event_id in event_ids]
+    return {
+        "workers": workers,
+        "events": len(event_ids),
+        "elapsed_s": elapsed,
+        "fires_per_s": sum(fired) / elapsed,
+        "not_completed": left,
+        "missed": sum(count == 0 for count in fired),
+        "fired_more_than_once": sum(count > 1 for count in fired),
+        "logged_more_than_once": sum(count > 1 for count in logs),
+        "exactly_once": all(count == 1 for count in fired) and all(count == 1 for count in logs),
+        "fired_per_worker": [lag["fired"] for lag in lags],
+        "lag_p99_s": max((lag["lag_p99_seconds"] for lag in lags), default=None),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine.echo = False
+    stub = StubServer(latency=args.latency)
+    await stub.start()
+
+    report = []
+    try:
+        for workers in (int(value) for value in args.workers.split(",")):
+            report.append(await run(args, workers, stub))
+    finally:
+        await stub.stop()
+        await engine.dispose()
+
+    base = report[0]["fires_per_s"] / report[0]["workers"]
+    for row in report:
+        row["scaling_efficiency"] = row["fires_per_s"] / (base * row["workers"])
+    print(json.dumps({"latency_s": args.latency, "concurrency": args.concurrency, "runs": report}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=50, help="Per worker")
+    parser.add_argument("--poll", type=float, default=0.1)
+    parser.add_argument("--pool-size", type=int, default=20, help="Per worker")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    asyncio.run(worker(args) if args.worker else main(args))
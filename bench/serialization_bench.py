@@ -0,0 +1,181 @@
+"""
+CPU time per 10k rows of the list endpoints, previous pipeline against the
+column-projected orjson path.
+
+Previous: ORM entities, `model_validate` per row, then FastAPI's response
+handling (validation against `response_model`, jsonable encoding) and the
+stdlib json. Current: the services' own column-projected queries, rows
+encoded by `ORJSONResponse`. Both include the database round trip; each
+path's output is checked to decode to the same JSON.
+
+Seeds one user with --rows events, --rows logs on one of them and --rows
+extra users into the database at DATABASE_URL (a scratch database migrated
+with `python migrate.py`), and deletes them afterwards.
+
+Run from the repository root:
+
+    python -m bench.serialization_bench --rows 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+from sqlalchemy import delete, select, text
+
+from db.database import async_session_maker, engine
+from db.models.event_model import Event
+from db.models.log_model import Log
+from db.models.user_model import User
+from db.schemas.event_schema import EventResponse
+from db.schemas.log_schema import LogResponse
+from db.schemas.user_schema import UserResponse
+from services.event_cache import event_cache
+from services.event_service import EventService
+from services.log_service import LogService
+from services.user_service import UserService
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO users (user_name, name, email, password, role)
+    SELECT :tag || '_' || g, 'Bench User ' || g, :tag || '_' || g || '@bench.local', '-', 'USER'
+    FROM generate_series(0, :rows) AS g
+    """,
+    """
+    INSERT INTO events (
+        creator_id, name, event_type, destination, method_type, payload, is_test,
+        interval_minutes, next_run_at, created_at, updated_at
+    )
+    SELECT u.id, 'bench event ' || g, 'INTERVAL', 'http://localhost/', 'POST', '{}', true,
+           60, now() + interval '1 day', now(), now()
+    FROM users AS u CROSS JOIN generate_series(1, :rows) AS g
+    WHERE u.user_name = :tag || '_0'
+    """,
+    """
+    INSERT INTO logs (
+        event_id, response, response_status_code, duration_ms, response_size,
+        timestamp, status
+    )
+    SELECT e.id, 'ok', 200, random() * 100, 2, now() - g * interval '1 second', 'ACTIVE'
+    FROM generate_series(1, :rows) AS g,
+         (SELECT min(events.id) AS id FROM events
+          JOIN users ON users.id = events.creator_id
+          WHERE users.user_name = :tag || '_0') AS e
+    """,
+)
+
+
+async def fastapi_body(schema: Type[BaseModel], content: Any) -> bytes:
+    """What FastAPI made of a list of models returned with `response_model`."""
+    field = create_response_field(name="bench", type_=List[schema])
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+async def measure(
+    call: Callable[[], Awaitable[bytes]], rows: int, repeat: int
+) -> Dict[str, Any]:
+    body = await call()  # Warm up statement caches
+    cpu = wall = 0.0
+    for _ in range(repeat):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        body = await call()
+        cpu += time.process_time() - cpu_start
+        wall += time.perf_counter() - wall_start
+    scale = 10_000 / rows / repeat
+    return {
+        "cpu_ms_per_10k_rows": cpu * scale * 1000,
+        "wall_ms_per_10k_rows": wall * scale * 1000,
+        "bytes": len(body),
+        "body": body,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine.echo = False  # SQL logging would dominate the measurement
+    tag = f"serbench_{uuid.uuid4().hex[:8]}"
+
+    async with async_session_maker() as db:
+        for statement in SEED_STATEMENTS:
+            await db.execute(text(statement), {"tag": tag, "rows": args.rows})
+        await db.commit()
+        user_id = await db.scalar(select(User.id).where(User.user_name == f"{tag}_0"))
+
+    async def events_before() -> bytes:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Event).where(Event.creator_id == user_id).order_by(Event.id)
+            )
+            events = [EventResponse.model_validate(event) for event in result.scalars()]
+            return await fastapi_body(EventResponse, events)
+
+    async def events_after() -> bytes:
+        event_cache.invalidate(user_id)  # Measure the cache miss
+        async with async_session_maker() as db:
+            _, body = await EventService.get_all_events(user_id, db)
+            return body
+
+    async def logs_before() -> bytes:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Log)
+                .join(Event, Event.id == Log.event_id)
+                .where(Event.creator_id == user_id)
+                .order_by(Log.timestamp.desc(), Log.id.desc())
+                .limit(args.rows + 1)
+            )
+            logs = [LogResponse.model_validate(log) for log in result.scalars()]
+            return await fastapi_body(LogResponse, logs[: args.rows])
+
+    async def logs_after() -> bytes:
+        async with async_session_maker() as db:
+            page = await LogService.get_all_logs(user_id, db, limit=args.rows)
+            return ORJSONResponse(page.rows).body
+
+    async def users_before() -> bytes:
+        async with async_session_maker() as db:
+            result = await db.execute(select(User).order_by(User.id).limit(args.rows + 1))
+            users = [UserResponse.model_validate(user) for user in result.scalars()]
+            return await fastapi_body(UserResponse, users[: args.rows])
+
+    async def users_after() -> bytes:
+        async with async_session_maker() as db:
+            page = await UserService.get_all_users(db, limit=args.rows)
+            return ORJSONResponse(page.rows).body
+
+    report = {}
+    try:
+        for name, before, after in (
+            ("events", events_before, events_after),
+            ("logs", logs_before, logs_after),
+            ("users", users_before, users_after),
+        ):
+            previous = await measure(before, args.rows, args.repeat)
+            current = await measure(after, args.rows, args.repeat)
+            identical = json.loads(previous.pop("body")) == json.loads(current.pop("body"))
+            report[name] = {
+                "previous": previous,
+                "current": current,
+                "cpu_speedup": previous["cpu_ms_per_10k_rows"] / current["cpu_ms_per_10k_rows"],
+                "identical_json": identical,
+            }
+    finally:
+        async with async_session_maker() as db:
+            await db.execute(delete(User).where(User.user_name.like(f"{tag}\\_%")))
+            await db.commit()
+        await engine.dispose()
+
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
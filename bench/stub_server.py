@@ -0,0 +1,69 @@
+"""
+Minimal keep-alive HTTP/1.1 server used as a local webhook target.
+
+Answers every request with `200 ok` (or `500` at `error_rate`) after
+`latency` seconds, and counts accepted connections so benchmarks can see
+how many connections a client opened, and requests per target path.
+"""
+
+import asyncio
+import random
+from collections import Counter
+from typing import Optional
+
+
+class StubServer:
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.connections = 0
+        self.requests = 0
+        self.paths: Counter = Counter()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/hook"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+
+                self.requests += 1
+                self.paths[head.split(b" ", 2)[1].decode()] += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                if random.random() < self.error_rate:
+                    status, body = b"500 Internal Server Error", b"error"
+                else:
+                    status, body = b"200 OK", b"ok"
+                writer.write(
+                    b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -1,16 +1,114 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 from dotenv import load_dotenv
 
+import metrics
+
 
 load_dotenv()
 
 # PostgreSQL connection URL
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Engine settings per environment; any of them can be overridden with the
+# matching DB_* variable (e.g. DB_POOL_SIZE=30)
+DB_PROFILES: Dict[str, Dict[str, Any]] = {
+    "dev": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30.0,
+        "pool_recycle": -1,
+        "pool_pre_ping": True,
+        "statement_cache_size": 100,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 10.0,
+        "pool_recycle": 1800,  # Outlive idle timeouts of proxies and PgBouncer
+        "pool_pre_ping": True,
+        "statement_cache_size": 500,
+    },
+    # Fixed-size pool, no per-checkout ping, nothing logged
+    "bench": {
+        "echo": False,
+        "pool_size": 50,
+        "max_overflow": 0,
+        "pool_timeout": 30.0,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "statement_cache_size": 500,
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "dev")
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE {DB_PROFILE!r}, expected one of {list(DB_PROFILES)}")
+
+
+def _setting(name: str) -> Any:
+    default = DB_PROFILES[DB_PROFILE][name]
+    value = os.getenv(f"DB_{name.upper()}")
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.lower() == "true"
+    return type(default)(value)
+
+
+DB_SETTINGS = {name: _setting(name) for name in DB_PROFILES[DB_PROFILE]}
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.peak_overflow = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            metrics.db_pool_wait.observe(waited)
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        self.checkouts += 1
+        self.peak_overflow = max(self.peak_overflow, self.overflow())
+        return record
+
+
 # Async engine
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=DB_SETTINGS["echo"],
+    poolclass=InstrumentedPool,
+    pool_size=DB_SETTINGS["pool_size"],
+    max_overflow=DB_SETTINGS["max_overflow"],
+    pool_timeout=DB_SETTINGS["pool_timeout"],
+    pool_recycle=DB_SETTINGS["pool_recycle"],
+    pool_pre_ping=DB_SETTINGS["pool_pre_ping"],
+    # Prepared statements kept per connection by the asyncpg dialect
+    connect_args={"prepared_statement_cache_size": DB_SETTINGS["statement_cache_size"]},
+)
 
 # Session factory
 async_session_maker = sessionmaker(
@@ -21,6 +119,26 @@ async_session_maker = sessionmaker(
 Base = declarative_base()
 
 
+def pool_stats() -> Dict[str, Any]:
+    """Live state of the connection pool along with checkout wait times."""
+    pool = engine.pool
+    checkouts = pool.checkouts
+    return {
+        "profile": DB_PROFILE,
+        "pool_size": pool.size(),
+        "max_overflow": DB_SETTINGS["max_overflow"],
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # Connections beyond pool_size; negative while the pool is still filling
+        "overflow": pool.overflow(),
+        "peak_overflow": pool.peak_overflow,
+        "checkouts": checkouts,
+        "timeouts": pool.timeouts,
+        "wait_ms_avg": pool.wait_seconds_total / checkouts * 1000 if checkouts else 0.0,
+        "wait_ms_max": pool.wait_seconds_max * 1000,
+    }
+
+
 # Initialises all the tables
 async def init_db():
     async with engine.begin() as conn:
@@ -23,3 +23,15 @@ class LogStatus(str, Enum):
     ACTIVE = "ACTIVE"
     ARCHIVED = "ARCHIVED"
     DELETED = "DELETED"
+
+
+class RollupGranularity(str, Enum):
+    MINUTE = "MINUTE"
+    HOUR = "HOUR"
+    DAY = "DAY"
+
+
+# File formats of event import and export
+class DataFormat(str, Enum):
+    NDJSON = "ndjson"  # One JSON object per line
+    CSV = "csv"  # Header row of field names
@@ -5,8 +5,10 @@ from sqlalchemy import (
     String,
     Boolean,
     Enum,
+    Index,
     Text,
     DateTime,
+    Float,
     Time,
 )
 from sqlalchemy.sql import func
@@ -18,6 +20,12 @@ from db.enums import EventType, MethodType
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Listing a user's events and every ownership check
+        Index("ix_events_creator_id_id", "creator_id", "id"),
+        # Index-only version check (count, latest update) of a user's listing
+        Index("ix_events_creator_id_updated_at", "creator_id", "updated_at"),
+    )
 
     id = Column(
         Integer, primary_key=True, index=True, autoincrement=True
@@ -40,6 +48,24 @@ class Event(Base):
         Time, nullable=True
     )  # Daily trigger time (only for FIXED_TIME type)
 
+    # Dispatch policy: extra attempts after a failure (network error, 408,
+    # 429 or 5xx), first backoff in seconds (doubled per attempt) and an
+    # optional request timeout overriding the HTTP_*_TIMEOUT settings
+    max_retries = Column(Integer, nullable=False, default=0, server_default="0")
+    retry_backoff_seconds = Column(
+        Float, nullable=False, default=1.0, server_default="1"
+    )
+    timeout_seconds = Column(Float, nullable=True)
+    # Limits of this event's requests to its destination host, applied within
+    # the host's HTTP_MAX_CONNECTIONS_PER_HOST / HTTP_RATE_LIMIT_PER_HOST budget
+    max_in_flight = Column(Integer, nullable=True)
+    rate_limit_per_second = Column(Float, nullable=True)
+
+    # Scheduling state: next due time and the node currently holding it
+    next_run_at = Column(DateTime, nullable=True, index=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
     created_at = Column(DateTime, server_default=func.now())  # Auto-generated timestamp
     updated_at = Column(
         DateTime, server_default=func.now(), onupdate=func.now()
@@ -1,23 +1,75 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Enum, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    false,
+)
+from sqlalchemy.orm import mapped_column, relationship
 from datetime import datetime
 from db.database import Base
 from db.enums import LogStatus
 
 
-class Log(Base):
-    __tablename__ = "logs"
-
+# Columns shared by the hot `logs` table and `logs_archive`
+class LogColumns:
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     event_id = Column(
         Integer, ForeignKey("events.id", ondelete="CASCADE")
     )  # Foreign key to Event
-    response = Column(String, nullable=False)  # Stores response text
+    response = Column(String, nullable=False)  # Preview of the response text
+    # zlib-compressed response text, capped at LOG_RESPONSE_MAX_BYTES; only
+    # loaded when a single log is fetched
+    response_body = mapped_column(LargeBinary, nullable=True, deferred=True)
+    response_size = Column(BigInteger, nullable=True)  # Full body size in bytes
+    response_sha256 = Column(String(64), nullable=True)  # Hash of the full body
+    response_truncated = Column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
     response_status_code = Column(Integer, nullable=False)  # HTTP response status
+    duration_ms = Column(Float, nullable=True)  # Total request time
+    # Request phases, None when skipped (no DNS, connect or TLS on a reused
+    # connection) or not reached; ttfb runs from request sent to headers
+    dns_ms = Column(Float, nullable=True)
+    connect_ms = Column(Float, nullable=True)
+    tls_ms = Column(Float, nullable=True)
+    send_ms = Column(Float, nullable=True)
+    ttfb_ms = Column(Float, nullable=True)
+    receive_ms = Column(Float, nullable=True)
+    request_size = Column(BigInteger, nullable=True)  # Request body bytes sent
+    # Response body bytes as transferred, before content decoding
+    response_wire_size = Column(BigInteger, nullable=True)
+    # 1 for the first request of a trigger, then one more per retry
+    attempt = Column(Integer, nullable=False, default=1, server_default="1")
     timestamp = Column(DateTime, default=datetime.utcnow)  # Auto-generated timestamp
     status = Column(
         Enum(LogStatus), nullable=False, default=LogStatus.ACTIVE
     )  # Log status
 
+
+class Log(LogColumns, Base):
+    __tablename__ = "logs"
+
     # Relation with event
     event = relationship("Event", back_populates="logs")
+
+
+# Logs moved out of `logs` by the retention policy, kept with status ARCHIVED
+class LogArchive(LogColumns, Base):
+    __tablename__ = "logs_archive"
+
+
+# Hot log reads are keyset-paginated newest first, per event or per user
+Index("ix_logs_event_id_timestamp_id", Log.event_id, Log.timestamp.desc(), Log.id.desc())
+Index("ix_logs_timestamp_id", Log.timestamp.desc(), Log.id.desc())
+# Retention purges archived logs by age
+Index("ix_logs_archive_timestamp", LogArchive.timestamp)
+# Deleting events cascades to their archived logs
+Index("ix_logs_archive_event_id", LogArchive.event_id)
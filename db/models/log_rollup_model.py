@@ -0,0 +1,41 @@
+from sqlalchemy import ARRAY, Column, DateTime, Enum, Float, ForeignKey, Integer
+
+from db.database import Base
+from db.enums import RollupGranularity
+
+# Upper bounds (ms) of the latency histogram buckets; one extra bucket holds
+# everything slower than the last bound
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LogRollup(Base):
+    """Delivery counters of one event over one time bucket, maintained from `logs`."""
+
+    __tablename__ = "log_rollups"
+
+    event_id = Column(
+        Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True
+    )
+    granularity = Column(Enum(RollupGranularity), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+
+    total = Column(Integer, nullable=False, default=0)
+    count_2xx = Column(Integer, nullable=False, default=0)
+    count_3xx = Column(Integer, nullable=False, default=0)
+    count_4xx = Column(Integer, nullable=False, default=0)
+    count_5xx = Column(Integer, nullable=False, default=0)
+    count_other = Column(Integer, nullable=False, default=0)  # 1xx or unexpected codes
+
+    latency_count = Column(Integer, nullable=False, default=0)
+    latency_sum_ms = Column(Float, nullable=False, default=0)
+    latency_histogram = Column(ARRAY(Integer), nullable=False)  # Per LATENCY_BUCKETS_MS
+    latency_max_ms = Column(Float, nullable=True)  # NULL for buckets folded before 0011
+
+
+class LogRollupState(Base):
+    """Single-row table holding the last log id folded into the rollups."""
+
+    __tablename__ = "log_rollup_state"
+
+    id = Column(Integer, primary_key=True)
+    last_log_id = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, ForeignKey, Integer
+
+from db.database import Base
+
+
+class RetentionPolicy(Base):
+    """Per-user override of the global log retention (LOG_ARCHIVE_AFTER_DAYS etc.)."""
+
+    __tablename__ = "retention_policies"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    archive_after_days = Column(Integer, nullable=False)  # Moved to logs_archive
+    delete_after_days = Column(Integer, nullable=False)  # Removed from logs_archive
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum
+from sqlalchemy import Column, Integer, String, Enum, Index, func
 from db.database import Base
 from sqlalchemy.orm import relationship
 from db.enums import UserRole
@@ -20,3 +20,21 @@ class User(Base):
     events = relationship(
         "Event", back_populates="creator", cascade="all, delete-orphan"
     )
+
+
+# Case-insensitive prefix search of the user listing, lower(column) LIKE 'abc%'
+Index(
+    "ix_users_user_name_lower_prefix",
+    func.lower(User.user_name).label("lower"),
+    postgresql_ops={"lower": "text_pattern_ops"},
+)
+Index(
+    "ix_users_name_lower_prefix",
+    func.lower(User.name).label("lower"),
+    postgresql_ops={"lower": "text_pattern_ops"},
+)
+Index(
+    "ix_users_email_lower_prefix",
+    func.lower(User.email).label("lower"),
+    postgresql_ops={"lower": "text_pattern_ops"},
+)
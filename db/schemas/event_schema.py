@@ -1,7 +1,7 @@
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from db.enums import EventType, MethodType
 from datetime import datetime, time
-from typing import Optional
+from typing import List, Optional
 
 
 class EventCreate(BaseModel):
@@ -20,6 +20,23 @@ class EventCreate(BaseModel):
         time(9, 0), description="Daily trigger time set to 9 AM GMT"
     )
 
+    # Retry policy, each attempt is logged
+    max_retries: int = Field(0, ge=0, le=10, description="Attempts after a failed one")
+    retry_backoff_seconds: float = Field(
+        1.0, gt=0, le=60, description="Wait before the first retry, doubled after each"
+    )
+    timeout_seconds: Optional[float] = Field(
+        None, gt=0, le=60, description="Request timeout, the server default if unset"
+    )
+
+    # Limits of this event's requests, applied within the destination host's
+    max_in_flight: Optional[int] = Field(
+        None, ge=1, le=1000, description="Requests to the destination at once"
+    )
+    rate_limit_per_second: Optional[float] = Field(
+        None, gt=0, le=10000, description="Requests started per second"
+    )
+
     @model_validator(mode="before")
     @classmethod
     def validate_event_type(cls, values):
@@ -42,3 +59,34 @@ class EventResponse(EventCreate):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
+
+
+class EventTriggerBatch(BaseModel):
+    ids: List[int] = Field(..., min_length=1, description="IDs of events to trigger")
+
+
+# An event of a bulk update, identified by id
+class EventBulkUpdate(EventCreate):
+    id: int
+
+
+class EventBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, description="IDs of events to delete")
+
+
+# Outcome of one item of a bulk request, in request order
+class EventBulkResult(BaseModel):
+    id: int
+    status_code: int  # 201 created, 200 updated or deleted, else why it was skipped
+    detail: Optional[str] = None
+
+
+class EventImportError(BaseModel):
+    line: int  # Line of the uploaded file, counting from 1
+    error: str
+
+
+class EventImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[EventImportError]  # The first EVENT_IMPORT_MAX_ERRORS of them
@@ -1,27 +1,103 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
-from db.enums import LogStatus
+from db.enums import LogStatus, RollupGranularity
+
+
+# Outcome of one event request, as recorded by a log
+class LogCreate(BaseModel):
+    event_id: int
+    response: str  # Preview of the response text
+    response_status_code: int
+    duration_ms: Optional[float] = None  # Total request time
+    response_body: Optional[bytes] = None  # Compressed, capped response bytes
+    response_size: Optional[int] = None
+    response_sha256: Optional[str] = None
+    response_truncated: bool = False
+    dns_ms: Optional[float] = None
+    connect_ms: Optional[float] = None
+    tls_ms: Optional[float] = None
+    send_ms: Optional[float] = None
+    ttfb_ms: Optional[float] = None  # From request sent to response headers
+    receive_ms: Optional[float] = None
+    request_size: Optional[int] = None
+    response_wire_size: Optional[int] = None  # Before content decoding
+    attempt: int = 1
 
 
 # Response includes system-generated fields (id, timestamp)
 class LogResponse(BaseModel):
     id: int  # System-generated ID
     event_id: int  # Foreign key (must be provided)
-    response: str
+    response: str  # Preview only, see LogDetailResponse for the stored body
     response_status_code: int
+    duration_ms: Optional[float] = None
+    response_size: Optional[int] = None  # Bytes received, None if the request failed
+    response_sha256: Optional[str] = None
+    response_truncated: bool = False  # Body was longer than what was stored
+    dns_ms: Optional[float] = None  # Request phases in ms, None if skipped
+    connect_ms: Optional[float] = None
+    tls_ms: Optional[float] = None
+    send_ms: Optional[float] = None
+    ttfb_ms: Optional[float] = None
+    receive_ms: Optional[float] = None
+    request_size: Optional[int] = None
+    response_wire_size: Optional[int] = None  # Before content decoding
+    attempt: int = 1  # Retries of the same trigger count up from 1
     timestamp: datetime  # Auto-generated
     status: LogStatus
 
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
 
 
+# A single log along with its decompressed response body
+class LogDetailResponse(LogResponse):
+    response_body: Optional[str] = None
+
+
 class LogsFilterByEventResponse(BaseModel):
     event_id: int
-    logs_count: int
+    logs_count: int  # Logs matching the filters, not just this page
     logs: List[LogResponse]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next page
 
     class Config:
         from_attributes = True
+
+
+# Query filters shared by the log listing and export endpoints
+class LogFilter(BaseModel):
+    since: Optional[datetime] = Field(None, description="Only logs at or after this time")
+    until: Optional[datetime] = Field(None, description="Only logs before this time")
+    status_code: Optional[int] = Field(None, description="Exact response status code")
+    status_class: Optional[int] = Field(
+        None, ge=1, le=5, description="Status code class, e.g. 5 for 5xx"
+    )
+
+
+# Delivery statistics of an event over one rollup bucket (or a whole range)
+class LogStatsBucket(BaseModel):
+    bucket_start: Optional[datetime] = None  # None for a range summary
+    total: int
+    success_rate: float  # Share of 2xx responses
+    count_2xx: int
+    count_3xx: int
+    count_4xx: int
+    count_5xx: int
+    count_other: int
+    latency_avg_ms: Optional[float] = None
+    latency_max_ms: Optional[float] = None
+    # Upper bounds of the histogram buckets holding the percentile; past the
+    # last bucket, the slowest latency (None if unknown)
+    latency_p50_ms: Optional[float] = None
+    latency_p95_ms: Optional[float] = None
+    latency_p99_ms: Optional[float] = None
+
+
+class LogStatsResponse(BaseModel):
+    event_id: int
+    granularity: RollupGranularity
+    summary: LogStatsBucket
+    buckets: List[LogStatsBucket]
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+class RetentionPolicyUpdate(BaseModel):
+    archive_after_days: int = Field(..., ge=1)
+    delete_after_days: int = Field(..., ge=1)
+
+    @model_validator(mode="after")
+    def validate_order(self):
+        if self.delete_after_days < self.archive_after_days:
+            raise ValueError("delete_after_days must not be less than archive_after_days")
+        return self
+
+
+class RetentionPolicyResponse(RetentionPolicyUpdate):
+    user_id: Optional[int] = None  # None when the global default applies
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Outcome of one retention run along with the table sizes after it
+class RetentionReport(BaseModel):
+    started_at: datetime
+    duration_seconds: float
+    archived: int
+    deleted: int
+    rows_per_second: float
+    hot_table_rows: int  # Statistics estimate, cheap to read
+    hot_table_bytes: int
+    archive_table_bytes: int
@@ -1,9 +1,14 @@
+import asyncio
+import hashlib
 import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
 
 from dotenv import load_dotenv
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 
 load_dotenv()
@@ -11,9 +16,72 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+# PEM keys for asymmetric algorithms (RS*, ES*, PS*); SECRET_KEY otherwise
+JWT_PRIVATE_KEY = os.getenv("JWT_PRIVATE_KEY") or SECRET_KEY
+JWT_PUBLIC_KEY = os.getenv("JWT_PUBLIC_KEY") or SECRET_KEY
+# Parse the keys once instead of on every encode/decode
+JWT_PREPARSE_KEYS = os.getenv("JWT_PREPARSE_KEYS", "true").lower() == "true"
+# Verified tokens remembered until their `exp` (0 disables)
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+
+# bcrypt cost; hashes made with another cost are rehashed at the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads running bcrypt, and hashes allowed to wait for one before new
+# requests are turned away with a 503
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1"))
 
 # context for hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL, so the threads hash in parallel. At most
+    `workers + max_queue` hashes may be pending; beyond that, callers get
+    `PasswordHasherBusy` right away instead of waiting behind the backlog.
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+    ):
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="bcrypt")
+        self._limit = workers + max_queue
+        self.pending = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self._limit:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, fn, *args
+            )
+        finally:
+            self.pending -= 1
+
+
+password_hasher = PasswordHasher()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -26,6 +94,38 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password(password: str) -> str:
+    """`get_password_hash` on the hashing pool."""
+    return await password_hasher.run(pwd_context.hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the hashing pool.
+
+    Returns whether it matches and, if the stored hash uses an outdated cost
+    or scheme, a new hash to store in its place.
+    """
+    return await password_hasher.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+def _load_key(key: Optional[str]) -> Any:
+    if not JWT_PREPARSE_KEYS or not key or not ALGORITHM:
+        return key
+    return jwk.construct(key, ALGORITHM)
+
+
+_signing_key = _load_key(JWT_PRIVATE_KEY)
+_verification_key = _load_key(JWT_PUBLIC_KEY)
+
+# sha256(token) -> (exp, claims), least recently used first
+_verified_tokens: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a new JWT access token."""
     to_encode = data.copy()
@@ -36,15 +136,37 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _signing_key, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def decode_access_token(token: str) -> dict:
-    """Decode JWT token"""
+    """
+    Decode JWT token
+
+    Tokens verified before are answered from memory until their `exp`, after
+    which they go through full verification again (and fail as expired).
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = _verified_tokens.get(digest)
+    if cached is not None:
+        if cached[0] > time.time():
+            _verified_tokens.move_to_end(digest)
+            return dict(cached[1])
+        del _verified_tokens[digest]
+
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        claims = jwt.decode(token, _verification_key, algorithms=[ALGORITHM])
     except jwt.ExpiredSignatureError:
         return {"error": "Token expired"}
     except JWTError:
         return {"error": "Invalid token"}
+
+    # Tokens without an expiry are never cached
+    exp = claims.get("exp")
+    if JWT_CACHE_SIZE > 0 and isinstance(exp, (int, float)):
+        _verified_tokens[digest] = (exp, claims)
+        if len(_verified_tokens) > JWT_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+
+    return dict(claims)
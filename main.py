@@ -1,17 +1,74 @@
+from contextlib import asynccontextmanager
 from typing import Any
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.sql import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from db.database import get_db
+from db.database import get_db, pool_stats
+from jwt_utils import PASSWORD_HASH_RETRY_AFTER, PasswordHasherBusy
+import metrics
 
-from routes import auth_router, events_router, logs_router, users_router
+from routes import (
+    auth_router,
+    events_router,
+    logs_router,
+    scheduler_router,
+    users_router,
+)
+from services.auth_service import AuthService
+from services.circuit_breaker import circuit_breakers
+from services.event_service import trigger_batches
+from services.http_dispatcher import http_dispatcher
+from services.log_writer import LOG_WRITER_ENABLED, log_writer
+from services.principal_cache import principal_cache
+from services.retention_service import LOG_RETENTION_ENABLED, retention_worker
+from services.rollup_service import LOG_ROLLUP_ENABLED, rollup_compactor
+from services.scheduler_service import SCHEDULER_ENABLED, scheduler
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await metrics.loop_lag_monitor.start()
+    await http_dispatcher.start()
+    await principal_cache.start()
+    if LOG_WRITER_ENABLED:
+        await log_writer.start()
+    if SCHEDULER_ENABLED:
+        await scheduler.start()
+    if LOG_ROLLUP_ENABLED:
+        await rollup_compactor.start()
+    if LOG_RETENTION_ENABLED:
+        await retention_worker.start()
+    yield
+    await retention_worker.stop()
+    await rollup_compactor.stop()
+    # Stop producers first so the writer drains their last logs
+    await scheduler.stop()
+    await trigger_batches.stop()
+    await log_writer.stop()
+    await principal_cache.stop()
+    await http_dispatcher.stop()
+    await metrics.loop_lag_monitor.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+# Shed password hashing load fast instead of queueing logins for seconds
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many authentication requests, try again shortly."},
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+    )
 
 app.include_router(auth_router.router)
 app.include_router(users_router.router)
 app.include_router(events_router.router)
 app.include_router(logs_router.router)
+app.include_router(scheduler_router.router)
 
 
 # Health check endpoint
@@ -20,6 +77,62 @@ def health_check() -> dict[str, str]:
     return {"status": "OK", "message": "Service is running!"}
 
 
+# Connection pool usage, for sizing pools against the number of workers
+@app.get("/health/db", dependencies=[Depends(AuthService.require_operator)])
+def db_pool_stats() -> dict[str, Any]:
+    return pool_stats()
+
+
+def collect_component_metrics() -> None:
+    pool = pool_stats()
+    metrics.db_pool_size.set(pool["pool_size"])
+    metrics.db_pool_connections.set(pool["checked_out"], "checked_out")
+    metrics.db_pool_connections.set(pool["checked_in"], "checked_in")
+    metrics.db_pool_connections.set(max(pool["overflow"], 0), "overflow")
+    metrics.db_pool_checkouts.set(pool["checkouts"])
+    metrics.db_pool_timeouts.set(pool["timeouts"])
+
+    metrics.scheduler_in_flight.set(scheduler.in_flight)
+    metrics.scheduler_fired.set(scheduler.lag.fired, "ok")
+    metrics.scheduler_fired.set(scheduler.lag.failed, "failed")
+    metrics.log_writer_queued.set(log_writer.queued)
+
+    dispatcher = http_dispatcher.stats()
+    metrics.http_connections_opened.set(dispatcher["connections_opened"])
+    metrics.http_dns_lookups.set(dispatcher["dns_lookups"])
+    in_flight: dict[str, int] = {}
+    queued: dict[str, int] = {}
+    for host, stats in http_dispatcher.host_stats().items():
+        label = metrics.host_label(host)
+        in_flight[label] = in_flight.get(label, 0) + stats["in_flight"]
+        queued[label] = queued.get(label, 0) + stats["queued"]
+    # Hosts whose limiters were evicted drop out of the gauges
+    metrics.dispatch_in_flight.clear()
+    metrics.dispatch_queued.clear()
+    for label in in_flight:
+        metrics.dispatch_in_flight.set(in_flight[label], label)
+        metrics.dispatch_queued.set(queued[label], label)
+
+    breakers = circuit_breakers.stats()
+    metrics.circuits_open.set(breakers["open"])
+    metrics.circuit_opens.set(breakers["opens"])
+
+
+metrics.registry.add_collector(collect_component_metrics)
+
+
+# Prometheus scrape endpoint, scraped with METRICS_TOKEN as bearer token
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(AuthService.require_operator)],
+)
+def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/")
 async def root(db: AsyncSession = Depends(get_db)) -> dict[str, Any | None]:
     result = await db.execute(text("SELECT 'Hello, Welcome to Event Scheduler!'"))
@@ -0,0 +1,294 @@
+"""
+In-process metrics exposed at `/metrics` in the Prometheus text format.
+
+Series are created on first use and then only updated in place: a counter is
+one float, a histogram a fixed list of bucket counts, so recording on the hot
+path allocates nothing but the label tuple. Values owned by other components
+(pool, scheduler, ...) are copied in by collectors when `/metrics` is scraped.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans fast DB calls up to slow webhooks
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Distinct destination hosts labelled individually, the rest share "other"
+MAX_HOST_LABELS = 200
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def set(self, value: float, *labels: str) -> None:
+        """Mirrors a running total kept by another component."""
+        self._values[labels] = value
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def clear(self) -> None:
+        """Drops every series, for gauges rebuilt on each collection."""
+        self._values.clear()
+
+
+class _Series:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self._bounds = tuple(buckets)
+        self._series: Dict[Labels, _Series] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _Series(len(self._bounds) + 1)
+        # The last slot counts values above every bound (+Inf)
+        series.counts[bisect_left(self._bounds, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self._bounds + ("+Inf",), series.counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {series.sum}")
+            lines.append(f"{self.name}_count{plain} {series.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> None:
+        self._metrics.append(metric)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Adds a function run at every scrape to refresh externally owned values."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+_hosts: Dict[str, str] = {}
+
+
+def host_label(host: str) -> str:
+    """Bounds the number of destination host label values."""
+    label = _hosts.get(host)
+    if label is not None:
+        return label
+    # Past the limit nothing is stored, so unseen hosts cannot grow the map
+    if len(_hosts) >= MAX_HOST_LABELS:
+        return "other"
+    _hosts[host] = host
+    return host
+
+
+# Hot-path metrics
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve API requests, by route template.",
+    ("method", "route", "status"),
+)
+dispatch_duration = Histogram(
+    "dispatch_duration_seconds",
+    "Time of outbound event requests, by destination host and outcome.",
+    ("host", "outcome"),
+)
+log_write_duration = Histogram(
+    "log_write_duration_seconds",
+    "Time to store dispatch logs.",
+    ("mode",),
+)
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+)
+event_loop_lag = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop runs a timer, sampled periodically.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+# Copied in at scrape time by the collector registered in main
+db_pool_connections = Gauge(
+    "db_pool_connections",
+    "Connections in the database pool, by state.",
+    ("state",),
+)
+db_pool_size = Gauge("db_pool_size", "Configured size of the database pool.")
+db_pool_checkouts = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the database pool."
+)
+db_pool_timeouts = Counter(
+    "db_pool_timeouts_total", "Checkouts that timed out waiting for a connection."
+)
+scheduler_in_flight = Gauge("scheduler_in_flight", "Scheduled events being fired.")
+scheduler_fired = Counter(
+    "scheduler_fired_total", "Scheduled events fired, by result.", ("result",)
+)
+log_writer_queued = Gauge("log_writer_queued", "Log rows waiting for the buffered writer.")
+http_connections_opened = Counter(
+    "http_dispatch_connections_opened_total", "Outbound connections opened."
+)
+http_dns_lookups = Counter("http_dispatch_dns_lookups_total", "Uncached DNS lookups.")
+dispatch_in_flight = Gauge(
+    "dispatch_in_flight", "Requests admitted to a destination host.", ("host",)
+)
+dispatch_queued = Gauge(
+    "dispatch_queue_depth",
+    "Requests waiting for a destination host's concurrency or rate limit.",
+    ("host",),
+)
+circuits_open = Gauge("dispatch_circuits_open", "Destination hosts whose circuit is open.")
+circuit_opens = Counter(
+    "dispatch_circuit_opens_total", "Times a destination host's circuit opened."
+)
+
+# Precomputed so recording formats nothing per request
+_STATUS_CLASSES = {code: f"{code // 100}xx" for code in range(100, 600)}
+
+
+def status_class(status: int) -> str:
+    return _STATUS_CLASSES.get(status, "other")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Set by the router on match; templates keep cardinality bounded
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status_class(status),
+            )
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires, i.e. how blocked the loop is."""
+
+    def __init__(self, interval: float = 0.5):
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self._interval
+            await asyncio.sleep(self._interval)
+            event_loop_lag.observe(max(0.0, time.perf_counter() - expected))
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -1,14 +1,12 @@
-import asyncio
-from db.database import init_db
-from db.models.event_model import Event
-from db.models.log_model import Log
-from db.models.user_model import User
+from alembic import command
+from alembic.config import Config
 
 
-async def run_migration():
-    await init_db()
-    print("Tables created successfully!")
+def run_migration():
+    # Applies every pending migration in migrations/versions
+    command.upgrade(Config("alembic.ini"), "head")
+    print("Database is up to date!")
 
 
 if __name__ == "__main__":
-    asyncio.run(run_migration())
+    run_migration()
@@ -0,0 +1,87 @@
+"""Baseline schema: users, events and logs
+
+Matches what `Base.metadata.create_all` produced before migrations existed.
+Databases created that way can be adopted with `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_name", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("role", sa.Enum("USER", "ADMIN", name="userrole"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+        sa.UniqueConstraint("user_name"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "events",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("creator_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column(
+            "event_type",
+            sa.Enum("INTERVAL", "FIXED_TIME", "ONE_TIME", name="eventtype"),
+            nullable=False,
+        ),
+        sa.Column("destination", sa.String(), nullable=False),
+        sa.Column(
+            "method_type",
+            sa.Enum("GET", "POST", "PUT", "DELETE", name="methodtype"),
+            nullable=False,
+        ),
+        sa.Column("payload", sa.Text(), nullable=True),
+        sa.Column("is_test", sa.Boolean(), nullable=True),
+        sa.Column("interval_minutes", sa.Integer(), nullable=True),
+        sa.Column("fixed_time", sa.Time(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["creator_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_events_id", "events", ["id"])
+
+    op.create_table(
+        "logs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("event_id", sa.Integer(), nullable=True),
+        sa.Column("response", sa.String(), nullable=False),
+        sa.Column("response_status_code", sa.Integer(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("ACTIVE", "ARCHIVED", "DELETED", name="logstatus"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["event_id"], ["events.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_logs_id", "logs", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("logs")
+    op.drop_table("events")
+    op.drop_table("users")
+    for name in ("logstatus", "methodtype", "eventtype", "userrole"):
+        op.execute(f"DROP TYPE {name}")
@@ -0,0 +1,120 @@
+"""Scheduling state, dispatch details, rollups and retention
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Existing enum types, referenced without being created again
+logstatus = postgresql.ENUM(name="logstatus", create_type=False)
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("next_run_at", sa.DateTime(), nullable=True))
+    op.add_column("events", sa.Column("lease_owner", sa.String(), nullable=True))
+    op.add_column("events", sa.Column("lease_expires_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_events_next_run_at", "events", ["next_run_at"])
+
+    op.add_column("logs", sa.Column("duration_ms", sa.Float(), nullable=True))
+    op.add_column("logs", sa.Column("response_body", sa.LargeBinary(), nullable=True))
+    op.add_column("logs", sa.Column("response_size", sa.BigInteger(), nullable=True))
+    op.add_column("logs", sa.Column("response_sha256", sa.String(64), nullable=True))
+    op.add_column(
+        "logs",
+        sa.Column(
+            "response_truncated",
+            sa.Boolean(),
+            server_default=sa.false(),
+            nullable=False,
+        ),
+    )
+
+    op.create_table(
+        "logs_archive",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("event_id", sa.Integer(), nullable=True),
+        sa.Column("response", sa.String(), nullable=False),
+        sa.Column("response_status_code", sa.Integer(), nullable=False),
+        sa.Column("duration_ms", sa.Float(), nullable=True),
+        sa.Column("response_body", sa.LargeBinary(), nullable=True),
+        sa.Column("response_size", sa.BigInteger(), nullable=True),
+        sa.Column("response_sha256", sa.String(64), nullable=True),
+        sa.Column(
+            "response_truncated", sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("status", logstatus, nullable=False),
+        sa.ForeignKeyConstraint(["event_id"], ["events.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_logs_archive_id", "logs_archive", ["id"])
+
+    op.create_table(
+        "log_rollups",
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "granularity",
+            sa.Enum("MINUTE", "HOUR", "DAY", name="rollupgranularity"),
+            nullable=False,
+        ),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("count_2xx", sa.Integer(), nullable=False),
+        sa.Column("count_3xx", sa.Integer(), nullable=False),
+        sa.Column("count_4xx", sa.Integer(), nullable=False),
+        sa.Column("count_5xx", sa.Integer(), nullable=False),
+        sa.Column("count_other", sa.Integer(), nullable=False),
+        sa.Column("latency_count", sa.Integer(), nullable=False),
+        sa.Column("latency_sum_ms", sa.Float(), nullable=False),
+        sa.Column("latency_histogram", sa.ARRAY(sa.Integer()), nullable=False),
+        sa.ForeignKeyConstraint(["event_id"], ["events.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("event_id", "granularity", "bucket_start"),
+    )
+
+    op.create_table(
+        "log_rollup_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("last_log_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "retention_policies",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("archive_after_days", sa.Integer(), nullable=False),
+        sa.Column("delete_after_days", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("retention_policies")
+    op.drop_table("log_rollup_state")
+    op.drop_table("log_rollups")
+    op.execute("DROP TYPE rollupgranularity")
+    op.drop_table("logs_archive")
+
+    for column in (
+        "response_truncated",
+        "response_sha256",
+        "response_size",
+        "response_body",
+        "duration_ms",
+    ):
+        op.drop_column("logs", column)
+
+    op.drop_index("ix_events_next_run_at", table_name="events")
+    for column in ("lease_expires_at", "lease_owner", "next_run_at"):
+        op.drop_column("events", column)
@@ -0,0 +1,58 @@
+"""Indexes for the hot event and log queries
+
+Built with CREATE INDEX CONCURRENTLY, so writes to `events` and `logs` keep
+going while they build. Postgres does not allow that inside a transaction,
+hence the autocommit block. A build interrupted midway leaves an INVALID
+index behind; drop it and run the upgrade again.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    # get_all_events and every ownership check
+    ("ix_events_creator_id_id", "events", ["creator_id", "id"]),
+    # Logs of one event, newest first (also serves the event_id foreign key)
+    (
+        "ix_logs_event_id_timestamp_id",
+        "logs",
+        ["event_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+    ),
+    # Logs of all of a user's events, newest first, and retention by age
+    ("ix_logs_timestamp_id", "logs", [sa.text("timestamp DESC"), sa.text("id DESC")]),
+    ("ix_logs_archive_timestamp", "logs_archive", ["timestamp"]),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,42 @@
+"""Per-phase timings and byte counts of dispatch logs
+
+Nullable columns without defaults, so adding them does not rewrite `logs`.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("logs", "logs_archive")
+COLUMNS = (
+    ("dns_ms", sa.Float),
+    ("connect_ms", sa.Float),
+    ("tls_ms", sa.Float),
+    ("send_ms", sa.Float),
+    ("ttfb_ms", sa.Float),
+    ("receive_ms", sa.Float),
+    ("request_size", sa.BigInteger),
+    ("response_wire_size", sa.BigInteger),
+)
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        for name, type_ in COLUMNS:
+            op.add_column(table, sa.Column(name, type_(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for name, _ in reversed(COLUMNS):
+            op.drop_column(table, name)
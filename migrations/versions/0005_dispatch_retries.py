@@ -0,0 +1,44 @@
+"""Per-event retry policy and attempt numbers on logs
+
+Constant server defaults, so Postgres adds the NOT NULL columns without
+rewriting `events` or `logs`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "events",
+        sa.Column("max_retries", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "events",
+        sa.Column("retry_backoff_seconds", sa.Float(), server_default="1", nullable=False),
+    )
+    op.add_column("events", sa.Column("timeout_seconds", sa.Float(), nullable=True))
+
+    for table in ("logs", "logs_archive"):
+        op.add_column(
+            table, sa.Column("attempt", sa.Integer(), server_default="1", nullable=False)
+        )
+
+
+def downgrade() -> None:
+    for table in ("logs_archive", "logs"):
+        op.drop_column(table, "attempt")
+
+    for column in ("timeout_seconds", "retry_backoff_seconds", "max_retries"):
+        op.drop_column("events", column)
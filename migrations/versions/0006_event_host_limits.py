@@ -0,0 +1,26 @@
+"""Per-event destination host limits
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("max_in_flight", sa.Integer(), nullable=True))
+    op.add_column("events", sa.Column("rate_limit_per_second", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("events", "rate_limit_per_second")
+    op.drop_column("events", "max_in_flight")
@@ -0,0 +1,39 @@
+"""Index the event foreign key of archived logs
+
+Without it every deleted event scans the whole of `logs_archive` for the
+cascade. Built concurrently, see 0003.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_logs_archive_event_id",
+            "logs_archive",
+            ["event_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_logs_archive_event_id",
+            table_name="logs_archive",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
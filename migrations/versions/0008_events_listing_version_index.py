@@ -0,0 +1,39 @@
+"""Index events by creator and update time
+
+Lets the ETag check of `GET /events/all` (count and latest `updated_at` of a
+user's events) run as an index-only scan. Built concurrently, see 0003.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_events_creator_id_updated_at",
+            "events",
+            ["creator_id", "updated_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_events_creator_id_updated_at",
+            table_name="events",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,36 @@
+"""Prefix search indexes of the user listing
+
+Expression indexes on lower(user_name), lower(name) and lower(email) with
+text_pattern_ops, so `lower(column) LIKE 'abc%'` is an index range scan
+whatever the database collation. Built concurrently, see 0003.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("user_name", "name", "email")
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in COLUMNS:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_{column}_lower_prefix "
+                f"ON users (lower({column}) text_pattern_ops)"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in COLUMNS:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_users_{column}_lower_prefix")
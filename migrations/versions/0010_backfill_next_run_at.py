@@ -0,0 +1,56 @@
+"""Backfill next_run_at of recurring events
+
+0002 added `next_run_at` without a value for existing rows, and both
+scheduler modes only fire rows where it is set. Recurring events get the
+fire time `next_fire_time` computes, in SQL and in UTC like the rest of the
+timestamps. ONE_TIME events created before 0002 already fired and stay NULL.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        WITH clock AS (SELECT timezone('utc', now()) AS now)
+        UPDATE events
+        SET next_run_at = CASE
+            WHEN events.event_type = 'INTERVAL' THEN
+                CASE
+                    WHEN coalesce(events.created_at, clock.now) > clock.now
+                        THEN events.created_at
+                    ELSE coalesce(events.created_at, clock.now)
+                        + (floor(extract(epoch FROM clock.now - coalesce(events.created_at, clock.now))
+                                 / (events.interval_minutes * 60)) + 1)
+                        * make_interval(mins => events.interval_minutes)
+                END
+            ELSE
+                CASE
+                    WHEN clock.now::date + events.fixed_time > clock.now
+                        THEN clock.now::date + events.fixed_time
+                    ELSE clock.now::date + events.fixed_time + interval '1 day'
+                END
+        END
+        FROM clock
+        WHERE events.next_run_at IS NULL
+          AND (
+            (events.event_type = 'INTERVAL' AND events.interval_minutes > 0)
+            OR (events.event_type = 'FIXED_TIME' AND events.fixed_time IS NOT NULL)
+          )
+        """
+    )
+
+
+def downgrade() -> None:
+    pass  # Data only: the values are valid at every earlier revision
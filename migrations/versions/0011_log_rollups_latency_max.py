@@ -0,0 +1,28 @@
+"""Slowest latency of each rollup bucket
+
+Bounds the percentiles landing in the overflow bucket of the latency
+histogram. Nullable, so Postgres adds it without rewriting `log_rollups`;
+buckets folded before it stay NULL.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("log_rollups", sa.Column("latency_max_ms", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("log_rollups", "latency_max_ms")
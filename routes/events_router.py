@@ -1,17 +1,31 @@
-from typing import List
+import json
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, Header, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.database import get_db
+from db.enums import DataFormat
 from db.models.user_model import User
-from db.schemas.event_schema import EventCreate, EventResponse
+from db.schemas.event_schema import (
+    EventBulkDelete,
+    EventBulkResult,
+    EventBulkUpdate,
+    EventCreate,
+    EventImportReport,
+    EventResponse,
+    EventTriggerBatch,
+)
 from db.schemas.log_schema import LogResponse
 from services.auth_service import AuthService
 from services.event_service import EventService
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
+# Per-user responses that clients must revalidate (ETag) before reuse
+CACHE_CONTROL = "private, no-cache"
+
 
 @router.post("/create", response_model=EventResponse)
 async def create_event(
@@ -26,23 +40,96 @@ async def create_event(
 
 @router.get("/all", response_model=List[EventResponse])
 async def get_all_events(
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """Fetch all your created events; 304 if unchanged since the ETag sent in If-None-Match."""
+
+    etag, body = await EventService.get_all_events(current_user.id, db, if_none_match)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# Declared before the /{id} routes, which would otherwise match "bulk"
+@router.post("/bulk", response_model=List[EventBulkResult], status_code=201)
+async def bulk_create_events(
+    events: List[EventCreate],
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> List[EventBulkResult]:
+    """Create many events in one transaction."""
+
+    return await EventService.bulk_create_events(current_user.id, events, db)
+
+
+@router.put("/bulk", response_model=List[EventBulkResult])
+async def bulk_update_events(
+    updates: List[EventBulkUpdate],
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> List[EventBulkResult]:
+    """Update many of your events by ID in one transaction, with a result per event."""
+
+    return await EventService.bulk_update_events(current_user.id, updates, db)
+
+
+@router.delete("/bulk", response_model=List[EventBulkResult])
+async def bulk_delete_events(
+    batch: EventBulkDelete,
     current_user: User = Depends(AuthService.get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> List[EventResponse]:
-    """Fetch all your created events."""
+) -> List[EventBulkResult]:
+    """Delete many of your events by ID in one transaction, with a result per event."""
+
+    return await EventService.bulk_delete_events(current_user.id, batch.ids, db)
+
+
+@router.get("/export")
+async def export_events(
+    format: DataFormat = DataFormat.NDJSON,
+    current_user: User = Depends(AuthService.get_current_user),
+) -> StreamingResponse:
+    """Download all your event definitions as NDJSON or CSV, streamed as they are read."""
+
+    media_type = "text/csv" if format == DataFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        EventService.export_events(current_user.id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="events.{format.value}"'},
+    )
 
-    return await EventService.get_all_events(current_user.id, db)
+
+@router.post("/import", response_model=EventImportReport)
+async def import_events(
+    file: UploadFile = File(...),
+    format: DataFormat = DataFormat.NDJSON,
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> EventImportReport:
+    """Create events from an NDJSON or CSV file, reporting invalid lines."""
+
+    return await EventService.import_events(current_user.id, file.file, format, db)
 
 
 @router.get("/{id}", response_model=EventResponse)
 async def get_event(
     id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(AuthService.get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> EventResponse:
-    """Fetch a specific event by ID."""
+    """Fetch a specific event by ID; 304 if unchanged since the ETag sent in If-None-Match."""
 
-    return await EventService.get_event(id, current_user.id, db)
+    etag, event = await EventService.get_event(id, current_user.id, db, if_none_match)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if event is None:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return event
 
 
 @router.put("/{id}", response_model=EventResponse)
@@ -68,6 +155,19 @@ async def delete_event(
     return await EventService.delete_event(id, current_user.id, db)
 
 
+@router.post("/trigger/batch")
+async def trigger_events(
+    batch: EventTriggerBatch,
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> StreamingResponse:
+    """Triggers several events, streaming one NDJSON result line per event as it finishes."""
+
+    results = await EventService.trigger_events(batch.ids, current_user.id, db)
+    lines = (json.dumps(result) + "\n" async for result in results)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
 @router.post("/trigger/{id}")
 async def trigger_event(
     id: int,
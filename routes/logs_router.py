@@ -1,9 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from db.database import get_db
+from db.enums import RollupGranularity
 from db.models.user_model import User
 from services.auth_service import AuthService
-from services.log_service import LogService
-from db.schemas.log_schema import LogResponse, LogsFilterByEventResponse
+from services.log_service import LOGS_PAGE_SIZE, LogService
+from services.retention_service import RetentionService, retention_worker
+from services.rollup_service import RollupService
+from db.schemas.log_schema import (
+    LogDetailResponse,
+    LogFilter,
+    LogResponse,
+    LogsFilterByEventResponse,
+    LogStatsResponse,
+)
+from db.schemas.retention_schema import (
+    RetentionPolicyResponse,
+    RetentionPolicyUpdate,
+    RetentionReport,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/logs", tags=["Logs"])
@@ -11,24 +29,135 @@ router = APIRouter(prefix="/logs", tags=["Logs"])
 
 @router.get("/", response_model=list[LogResponse])
 async def get_all_logs(
+    filters: LogFilter = Depends(),
+    limit: int = Query(LOGS_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """Retrieve event logs, newest first. The next page's cursor is in `X-Next-Cursor`."""
+
+    page = await LogService.get_all_logs(current_user.id, db, filters, limit, cursor)
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+
+    # Rows are encoded as they are, response_model only documents them
+    return ORJSONResponse(page.rows, headers=headers)
+
+
+@router.get("/export")
+async def export_logs(
+    filters: LogFilter = Depends(),
+    event_id: Optional[int] = None,
     current_user: User = Depends(AuthService.get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> list[LogResponse]:
-    """Retrieve all event logs."""
+) -> StreamingResponse:
+    """Stream all matching logs as NDJSON, optionally for a single event."""
 
-    return await LogService.get_all_logs(current_user.id, db)
+    lines = await LogService.export_logs(current_user.id, db, filters, event_id)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
-@router.get("/filter/by/{event_id}")
+@router.get("/filter/by/{event_id}", response_model=LogsFilterByEventResponse)
 async def get_logs_by_event(
     event_id: int,
+    filters: LogFilter = Depends(),
+    limit: int = Query(LOGS_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
     current_user: User = Depends(AuthService.get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> LogsFilterByEventResponse:
+) -> Response:
     """API to fetch logs along with their count"""
-    logs_data = await LogService.get_logs_with_count(current_user.id, event_id, db)
+    logs_data = await LogService.get_logs_with_count(
+        current_user.id, event_id, db, filters, limit, cursor
+    )
 
-    if logs_data.logs_count == 0:
+    if logs_data["logs_count"] == 0:
         raise HTTPException(status_code=404, detail="No logs found for this event.")
 
-    return logs_data
+    return ORJSONResponse(logs_data)
+
+
+@router.get("/stats/{event_id}", response_model=LogStatsResponse)
+async def get_event_stats(
+    event_id: int,
+    granularity: RollupGranularity = RollupGranularity.HOUR,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(48, ge=1, le=1000),
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> LogStatsResponse:
+    """
+    Success rate, status classes and latency percentiles of an event per time bucket.
+
+    Served from pre-aggregated rollups, which trail the logs by up to
+    LOG_ROLLUP_GRACE_SECONDS plus one compaction interval.
+    """
+    await LogService.check_event_access(current_user.id, event_id, db)
+
+    return await RollupService.get_event_stats(
+        event_id, granularity, since, until, limit, db
+    )
+
+
+@router.get("/retention/policy", response_model=RetentionPolicyResponse)
+async def get_retention_policy(
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> RetentionPolicyResponse:
+    """Retention policy applied to the current user's logs."""
+    return await RetentionService.get_policy(current_user.id, db)
+
+
+@router.put("/retention/policy", response_model=RetentionPolicyResponse)
+async def set_retention_policy(
+    policy: RetentionPolicyUpdate,
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> RetentionPolicyResponse:
+    """Set how long the current user's logs stay hot and archived."""
+    return await RetentionService.set_policy(current_user.id, policy, db)
+
+
+@router.delete("/retention/policy", response_model=RetentionPolicyResponse)
+async def delete_retention_policy(
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> RetentionPolicyResponse:
+    """Go back to the global retention policy."""
+    return await RetentionService.delete_policy(current_user.id, db)
+
+
+@router.get("/retention/status", response_model=Optional[RetentionReport])
+async def get_retention_status(
+    current_user: User = Depends(AuthService.get_current_user),
+) -> Optional[RetentionReport]:
+    """Report of the last retention run, if any."""
+
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Admin access required.")
+
+    return retention_worker.last_report
+
+
+@router.post("/retention/run", response_model=RetentionReport)
+async def run_retention(
+    current_user: User = Depends(AuthService.get_current_user),
+) -> RetentionReport:
+    """Apply the retention policies now instead of waiting for the next run."""
+
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Admin access required.")
+
+    return await retention_worker.run_once()
+
+
+# Declared last so it does not shadow the fixed paths above
+@router.get("/{log_id}", response_model=LogDetailResponse)
+async def get_log(
+    log_id: int,
+    current_user: User = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> LogDetailResponse:
+    """Retrieve a single log along with its stored response body."""
+    return await LogService.get_log(log_id, current_user.id, db)
@@ -0,0 +1,15 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from services.auth_service import AuthService
+from services.scheduler_service import scheduler
+
+router = APIRouter(prefix="/scheduler", tags=["Scheduler"])
+
+
+@router.get("/stats", dependencies=[Depends(AuthService.require_operator)])
+def get_scheduler_stats() -> dict[str, Any]:
+    """Scheduler state and firing lag (how late events fire vs. their due time)."""
+
+    return scheduler.stats()
@@ -1,26 +1,55 @@
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.database import get_db
 from db.models.user_model import User
 from db.schemas.user_schema import UserResponse, UserUpdate
 from services.auth_service import AuthService
-from services.user_service import UserService
+from services.user_service import USERS_PAGE_SIZE, UserService
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/", response_model=list[UserResponse])
 async def get_all_users(
+    limit: int = Query(USERS_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(
+        None,
+        min_length=1,
+        max_length=254,
+        description="Prefix of the user name, name or email",
+    ),
+    current_user: User = Depends(AuthService.get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> List[UserResponse]:
-    return await UserService.get_all_users(db)
+) -> Response:
+    """List users by ID (admin only). The next page's cursor is in `X-Next-Cursor`."""
+
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Admin access required.")
+
+    page = await UserService.get_all_users(db, limit, cursor, q)
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+
+    # Rows are encoded as they are, response_model only documents them
+    return ORJSONResponse(page.rows, headers=headers)
 
 
 @router.get("/{id}", response_model=UserResponse)
-async def get_user(id: int, db: AsyncSession = Depends(get_db)) -> UserResponse:
+async def get_user(
+    id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(AuthService.get_current_user),
+) -> UserResponse:
+
+    if current_user.id != id and current_user.role != "ADMIN":
+        raise HTTPException(
+            status_code=403, detail="You can only view your own account."
+        )
+
     return await UserService.get_user(id, db)
 
 
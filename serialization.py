@@ -0,0 +1,36 @@
+"""
+Fast path for large list responses.
+
+List endpoints select only the columns of their response schema and encode
+the rows straight to JSON bytes with orjson, instead of loading ORM entities,
+validating each into a model, having FastAPI validate them again against the
+`response_model` and encoding the result with the stdlib json. The output is
+the same JSON: ISO datetimes and times, enum values, nulls.
+
+The rows are trusted to satisfy the schema, as they come from its own columns.
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+
+class RowsPage(NamedTuple):
+    rows: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+def schema_columns(entity: Any, schema: Type[BaseModel]) -> Tuple[Any, ...]:
+    """Columns of `entity` named like the fields of `schema`, in field order."""
+    return tuple(getattr(entity, name) for name in schema.model_fields)
+
+
+def as_dicts(rows: Iterable[Row]) -> List[Dict[str, Any]]:
+    return [row._asdict() for row in rows]
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content)
+
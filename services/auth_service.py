@@ -1,7 +1,13 @@
+import hmac
+import os
+
+from dotenv import load_dotenv
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, update
 from sqlalchemy.future import select
 
 import jwt_utils
@@ -10,9 +16,16 @@ from db.enums import UserRole
 from db.models.user_model import User
 from db.schemas.token_schema import TokenResponse
 from db.schemas.user_schema import UserCreate, UserLogin, UserResponse
-from jwt_utils import create_access_token, decode_access_token, verify_password
+from jwt_utils import create_access_token, decode_access_token
+from services.principal_cache import principal_cache
+from services.user_service import USER_RESPONSE_COLUMNS, raise_unique_violation
+
+load_dotenv()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+# Bearer token of metrics scrapers on the operational endpoints, which admins
+# reach with their own token; unset, only admins do
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 
 class AuthService:
@@ -20,34 +33,27 @@ class AuthService:
     @staticmethod
     async def register_user(user: UserCreate, db: AsyncSession) -> UserResponse:
         """Creates a user and stores it in the database."""
-        hashed_password = jwt_utils.get_password_hash(user.password)
-
-        # Checks if email already exists
-        existing_email = await db.execute(select(User).where(User.email == user.email))
-        if existing_email.scalars().first():
-            raise HTTPException(
-                status_code=400, detail="A user with this email already exists."
-            )
-
-        # Checks if username is already taken
-        existing_username = await db.execute(
-            select(User).where(User.user_name == user.user_name)
-        )
-        if existing_username.scalars().first():
-            raise HTTPException(
-                status_code=400, detail="This username is already taken."
+        hashed_password = await jwt_utils.hash_password(user.password)
+
+        # One INSERT ... RETURNING; a taken email or username violates its
+        # unique constraint
+        try:
+            result = await db.execute(
+                insert(User)
+                .values(
+                    user_name=user.user_name,
+                    name=user.name,
+                    email=user.email,
+                    password=hashed_password,
+                    role=UserRole.USER,
+                )
+                .returning(*USER_RESPONSE_COLUMNS)
             )
-
-        new_user = User(
-            user_name=user.user_name,
-            name=user.name,
-            email=user.email,
-            password=hashed_password,
-            role=UserRole.USER,
-        )
-        db.add(new_user)
-        await db.commit()
-        await db.refresh(new_user)
+            new_user = result.one()
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise_unique_violation(e)
 
         return UserResponse.model_validate(new_user)
 
@@ -61,9 +67,22 @@ class AuthService:
         )
         user = result.scalars().first()
 
-        if not user or not verify_password(user_data.password, user.password):
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid username or password")
+
+        verified, new_hash = await jwt_utils.verify_and_update_password(
+            user_data.password, user.password
+        )
+        if not verified:
             raise HTTPException(status_code=401, detail="Invalid username or password")
 
+        # Stored with an outdated bcrypt cost, upgrade it while we have the password
+        if new_hash:
+            await db.execute(
+                update(User).where(User.id == user.id).values(password=new_hash)
+            )
+            await db.commit()
+
         token = create_access_token(
             {"sub": user.user_name}
         )  # Use username as JWT subject
@@ -72,8 +91,8 @@ class AuthService:
     @staticmethod
     async def get_current_user(
         token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-    ) -> User:
-        """Get user from JWT token"""
+    ) -> UserResponse:
+        """Get user from JWT token, served from the principal cache when possible"""
 
         payload = decode_access_token(token)
 
@@ -84,10 +103,30 @@ class AuthService:
         if not user_name:
             raise HTTPException(status_code=401, detail="Invalid token payload")
 
+        user = principal_cache.get(user_name)
+        if user:
+            return user
+
+        generation = principal_cache.generation
         result = await db.execute(select(User).where(User.user_name == user_name))
         user = result.scalar()
 
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
+        user = UserResponse.model_validate(user)
+        principal_cache.put(user_name, user, generation)
         return user
+
+    @staticmethod
+    async def require_operator(
+        token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+    ) -> None:
+        """Admit the configured metrics token or an admin's access token."""
+
+        if METRICS_TOKEN and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            return
+
+        current_user = await AuthService.get_current_user(token, db)
+        if current_user.role != "ADMIN":
+            raise HTTPException(status_code=403, detail="Admin access required.")
@@ -0,0 +1,90 @@
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Consecutive failed requests (network errors and 5xx) that open a host's
+# circuit, and how long it then stays open before a single probe is let through
+DISPATCH_BREAKER_FAILURES = int(os.getenv("DISPATCH_BREAKER_FAILURES", "5"))
+DISPATCH_BREAKER_COOLDOWN_SECONDS = float(
+    os.getenv("DISPATCH_BREAKER_COOLDOWN_SECONDS", "30")
+)
+
+
+class CircuitBreaker:
+    """
+    Failure tracking of one destination host.
+
+    Closed: every request goes through. Open: requests fail fast until the
+    cooldown has passed. Half-open: one probe request goes through, its
+    outcome closes the circuit or opens it for another cooldown.
+    """
+
+    __slots__ = ("failures", "opened_at", "probing", "opens")
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.opens = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; claims the probe when half-open."""
+        if self.opened_at is None:
+            return True
+        if self.probing or time.monotonic() - self.opened_at < DISPATCH_BREAKER_COOLDOWN_SECONDS:
+            return False
+        self.probing = True
+        return True
+
+    def record(self, healthy: Optional[bool]) -> None:
+        """Records the outcome of an allowed request; None if it never completed."""
+        self.probing = False
+        if healthy is None:
+            return
+        if healthy:
+            self.failures = 0
+            self.opened_at = None
+            return
+
+        self.failures += 1
+        # A failed probe re-opens right away
+        if self.opened_at is not None or self.failures >= DISPATCH_BREAKER_FAILURES:
+            if self.opened_at is None:
+                self.opens += 1
+            self.opened_at = time.monotonic()
+
+
+class CircuitBreakers:
+    """
+    Circuit breakers keyed by destination host and port, so separate
+    services on one machine do not share a circuit.
+    """
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, Optional[int]], CircuitBreaker] = {}
+
+    def get(self, url: httpx.URL) -> CircuitBreaker:
+        key = (url.host, url.port)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker()
+        return breaker
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hosts": len(self._breakers),
+            "open": sum(breaker.is_open for breaker in self._breakers.values()),
+            "opens": sum(breaker.opens for breaker in self._breakers.values()),
+        }
+
+
+circuit_breakers = CircuitBreakers()
@@ -0,0 +1,291 @@
+import asyncio
+import codecs
+import hashlib
+import logging
+import os
+import random
+import time
+import zlib
+from typing import Any, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import metrics
+from db.enums import MethodType
+from db.schemas.log_schema import LogCreate, LogResponse
+from services.circuit_breaker import CircuitBreaker, circuit_breakers
+from services.http_dispatcher import AdmissionTimeout, RequestTimings, http_dispatcher
+from services.log_service import LogService
+
+load_dotenv()
+
+# Response bytes stored per log (the rest is only counted and hashed), and
+# characters of it returned by list endpoints
+LOG_RESPONSE_MAX_BYTES = int(os.getenv("LOG_RESPONSE_MAX_BYTES", "65536"))
+LOG_RESPONSE_PREVIEW_CHARS = int(os.getenv("LOG_RESPONSE_PREVIEW_CHARS", "256"))
+LOG_RESPONSE_COMPRESSION_LEVEL = int(os.getenv("LOG_RESPONSE_COMPRESSION_LEVEL", "6"))
+# Upper bound on the wait between two attempts, whatever the event's backoff
+DISPATCH_RETRY_MAX_BACKOFF_SECONDS = float(
+    os.getenv("DISPATCH_RETRY_MAX_BACKOFF_SECONDS", "30")
+)
+# Seconds a trigger made through the API may spend queueing and retrying
+DISPATCH_TRIGGER_MAX_SECONDS = float(os.getenv("DISPATCH_TRIGGER_MAX_SECONDS", "30"))
+
+# Outcomes worth another attempt; failed requests are logged as 500
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchService:
+
+    @staticmethod
+    async def _read_body(response: httpx.Response) -> Tuple[bytes, int, str]:
+        """
+        Reads a streamed response body chunk by chunk.
+
+        Returns the first `LOG_RESPONSE_MAX_BYTES` bytes along with the size and
+        SHA-256 of the whole body, so memory use does not depend on its length.
+        """
+        digest = hashlib.sha256()
+        kept = bytearray()
+        size = 0
+
+        async for chunk in response.aiter_bytes():
+            digest.update(chunk)
+            size += len(chunk)
+            room = LOG_RESPONSE_MAX_BYTES - len(kept)
+            if room > 0:
+                kept += chunk[:room]
+
+        return bytes(kept), size, digest.hexdigest()
+
+    @staticmethod
+    def _decode(body: bytes, encoding: str | None) -> str:
+        try:
+            codecs.lookup(encoding or "utf-8")
+        except LookupError:
+            encoding = None
+        # A multi-byte character cut by the cap is replaced, not an error
+        return body.decode(encoding or "utf-8", errors="replace")
+
+    @staticmethod
+    def _breaker(url: httpx.URL) -> Optional[CircuitBreaker]:
+        """
+        Circuit of a destination; None without a host, as such requests fail
+        before reaching anyone and must not share one circuit.
+        """
+        return circuit_breakers.get(url) if url.host else None
+
+    @staticmethod
+    async def send(
+        event: Any,
+        attempt: int = 1,
+        slots: Optional[asyncio.Semaphore] = None,
+        deadline: Optional[float] = None,
+    ) -> LogCreate:
+        """
+        Makes the API request of an event and returns its outcome, without storing it.
+
+        Fails fast with a 503 log, without sending anything, while the circuit
+        of the destination host is open.
+
+        Args:
+            event: Anything exposing `id`, `method_type`, `destination`, `payload`
+                and the retry settings (an `Event` row or a scheduler entry).
+            attempt: Number of this attempt, starting at 1.
+            slots: Caller's concurrency limit, held only once the destination
+                host admits the request (see `HttpDispatcher.stream`).
+            deadline: `time.monotonic()` by which the request must have left
+                the host's queue, else it is logged as not sent (503).
+        """
+        method = event.method_type
+        url = event.destination
+
+        response_text = "Request failed"
+        response_status = 500  # Default to server error
+        response_body = response_size = response_sha256 = None
+        truncated = False
+        outcome = "error"
+        request_size = response_wire_size = None
+        timings = RequestTimings()
+
+        if method not in (
+            MethodType.GET,
+            MethodType.POST,
+            MethodType.PUT,
+            MethodType.DELETE,
+        ):
+            raise HTTPException(status_code=400, detail="Unsupported method")
+
+        try:
+            parsed = httpx.URL(url)
+        except httpx.InvalidURL as e:
+            logger.warning("Event %s has an invalid destination: %s", event.id, e)
+            metrics.dispatch_duration.observe(0.0, metrics.host_label(""), outcome)
+            return LogCreate(
+                event_id=event.id,
+                response=f"Invalid URL: {e}",
+                response_status_code=response_status,
+                duration_ms=0.0,
+                attempt=attempt,
+            )
+
+        host = parsed.host
+        breaker = DispatchService._breaker(parsed)
+        if breaker is not None and not breaker.allow():
+            metrics.dispatch_duration.observe(0.0, metrics.host_label(host), "circuit_open")
+            return LogCreate(
+                event_id=event.id,
+                response=f"Not sent: circuit open for {parsed.netloc.decode()}",
+                response_status_code=503,
+                duration_ms=0.0,
+                attempt=attempt,
+            )
+
+        # Only POST and PUT carry the payload
+        body = event.payload if method in (MethodType.POST, MethodType.PUT) else None
+        options: dict[str, Any] = {
+            "json": body,
+            "max_in_flight": event.max_in_flight,
+            "rate": event.rate_limit_per_second,
+            "slots": slots,
+            "deadline": deadline,
+        }
+        if event.timeout_seconds is not None:
+            options["timeout"] = event.timeout_seconds
+
+        healthy = None
+        start = time.perf_counter()
+        try:
+            async with http_dispatcher.stream(
+                method.value, url, timings=timings, **options
+            ) as response:
+                kept, response_size, response_sha256 = await DispatchService._read_body(
+                    response
+                )
+            request_size = len(response.request.content)
+            response_wire_size = response.num_bytes_downloaded
+
+            # Update response details on success
+            response_text = DispatchService._decode(kept, response.charset_encoding)
+            response_status = response.status_code
+            healthy = response_status < 500
+            outcome = metrics.status_class(response_status)
+            truncated = response_size > len(kept)
+            # The bytes as received, so they match `response_sha256` up to the cap
+            response_body = zlib.compress(kept, LOG_RESPONSE_COMPRESSION_LEVEL)
+
+        # Queued behind the host's limits until the caller's deadline: nothing
+        # was sent, and it says nothing about the host's health
+        except AdmissionTimeout:
+            response_text = f"Not sent: still queued for {host} at the deadline"
+            response_status = 503
+            outcome = "queue_timeout"
+
+        # Handling request failure (network issue, invalid URL, etc.)
+        except (httpx.RequestError, httpx.InvalidURL) as e:
+            logger.warning("Request of event %s to %s failed: %r", event.id, host, e)
+            response_text = str(e) or type(e).__name__
+            healthy = False
+
+        finally:
+            if breaker is not None:
+                breaker.record(healthy)
+
+        elapsed = time.perf_counter() - start
+        metrics.dispatch_duration.observe(elapsed, metrics.host_label(host), outcome)
+
+        return LogCreate(
+            event_id=event.id,
+            response=response_text[:LOG_RESPONSE_PREVIEW_CHARS],
+            response_status_code=response_status,
+            duration_ms=elapsed * 1000,
+            response_body=response_body,
+            response_size=response_size,
+            response_sha256=response_sha256,
+            response_truncated=truncated,
+            request_size=request_size,
+            response_wire_size=response_wire_size,
+            attempt=attempt,
+            **timings.as_dict(),
+        )
+
+    @staticmethod
+    def retry_delay(
+        event: Any, log: LogCreate, deadline: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt of an event, None if there is none.
+
+        The backoff doubles from `retry_backoff_seconds` on every attempt, with
+        half of it randomised so retries of many events do not line up. No
+        retry is made into an open circuit, nor past a `deadline`
+        (`time.monotonic()`).
+        """
+        if log.attempt > event.max_retries or log.response_status_code not in RETRY_STATUS_CODES:
+            return None
+        try:
+            breaker = DispatchService._breaker(httpx.URL(event.destination))
+        except httpx.InvalidURL:
+            return None  # Fails the same way every time
+        if breaker is not None and breaker.is_open:
+            return None
+
+        backoff = min(
+            event.retry_backoff_seconds * 2 ** (log.attempt - 1),
+            DISPATCH_RETRY_MAX_BACKOFF_SECONDS,
+        )
+        delay = backoff / 2 + random.uniform(0, backoff / 2)
+        if deadline is not None and time.monotonic() + delay > deadline:
+            return None
+        return delay
+
+    @staticmethod
+    async def attempt(
+        event: Any,
+        attempt: int,
+        db: AsyncSession,
+        deadline: Optional[float] = None,
+        slots: Optional[asyncio.Semaphore] = None,
+    ) -> Tuple[LogResponse, Optional[float]]:
+        """
+        Sends one attempt of an event and logs it.
+
+        Returns:
+            The stored log, and the seconds to wait before the next attempt or
+            None if it was the last one. With a `deadline` (`time.monotonic()`),
+            no attempt is planned past it, and one still queued at its host
+            by then is not sent.
+        """
+        log = await DispatchService.send(event, attempt, slots, deadline)
+        stored = await LogService.create_log(log, db)
+
+        return stored, DispatchService.retry_delay(event, log, deadline)
+
+    @staticmethod
+    async def dispatch(event: Any, db: AsyncSession) -> LogResponse:
+        """
+        Sends the request of an event, retrying per its policy, and logs every attempt.
+
+        Retries are planned only within `DISPATCH_TRIGGER_MAX_SECONDS`, so
+        the caller's request is held for at most that plus one attempt.
+
+        Args:
+            event: The event to trigger, see `send`.
+            db (AsyncSession): The database session.
+
+        Returns:
+            LogResponse: Contains details of the last attempt.
+        """
+        deadline = time.monotonic() + DISPATCH_TRIGGER_MAX_SECONDS
+        log, delay = await DispatchService.attempt(event, 1, db, deadline)
+        attempt = 1
+        while delay is not None:
+            await asyncio.sleep(delay)
+            attempt += 1
+            log, delay = await DispatchService.attempt(event, attempt, db, deadline)
+        return log
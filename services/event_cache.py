@@ -0,0 +1,84 @@
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Users whose serialized event listing is kept per worker (0 disables the cache)
+EVENT_CACHE_MAX_USERS = int(os.getenv("EVENT_CACHE_MAX_USERS", "1000"))
+
+
+def make_etag(count: int, last_updated_at: Optional[datetime]) -> str:
+    """
+    Strong ETag of a set of event definitions.
+
+    Every change of a definition moves `updated_at` forward and every create
+    or delete changes either it or the count, so the pair identifies the set.
+    """
+    stamp = last_updated_at.isoformat() if last_updated_at else "-"
+    return f'"{count}-{stamp}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names `etag` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class EventListCache:
+    """
+    LRU cache of each user's serialized event listing along with its ETag.
+
+    Entries are only served after the caller has read the current ETag from
+    the database, so changes made by other workers are never missed; the
+    invalidations of `EventService` just drop listings known to be stale.
+    """
+
+    def __init__(self, max_size: int = EVENT_CACHE_MAX_USERS):
+        self._max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[str, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int, etag: str) -> Optional[bytes]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != etag:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user_id: int, etag: str, body: bytes) -> None:
+        if self._max_size <= 0:
+            return
+
+        self._entries[user_id] = (etag, body)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self.invalidations += 1
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+event_cache = EventListCache()
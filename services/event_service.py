@@ -1,61 +1,226 @@
+import asyncio
+import csv
+import io
+import os
+import time
 from datetime import datetime
-from typing import List
+from typing import (
+    IO,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
-import httpx
+from dotenv import load_dotenv
 from fastapi import HTTPException
-from sqlalchemy import select
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.enums import EventType, MethodType
+import serialization
+from db.database import async_session_maker
+from db.enums import DataFormat, EventType
 from db.models.event_model import Event
-from db.schemas.event_schema import EventCreate, EventResponse
-from db.schemas.log_schema import LogResponse
+from db.schemas.event_schema import (
+    EventBulkResult,
+    EventBulkUpdate,
+    EventCreate,
+    EventImportError,
+    EventImportReport,
+    EventResponse,
+)
+from db.schemas.log_schema import LogCreate, LogResponse
+from services.dispatch_service import DISPATCH_TRIGGER_MAX_SECONDS, DispatchService
+from services.event_cache import etag_matches, event_cache, make_etag
 from services.log_service import LogService
+from services.scheduler_service import (
+    SCHEDULED_COLUMNS,
+    first_run_at,
+    rescheduled_run_at,
+    scheduler,
+)
+
+load_dotenv()
+
+# Batch triggers: max ids per request, requests dispatched at once and how
+# long a shutdown waits for running batches before cancelling them
+TRIGGER_BATCH_MAX_SIZE = int(os.getenv("TRIGGER_BATCH_MAX_SIZE", "1000"))
+TRIGGER_BATCH_CONCURRENCY = int(os.getenv("TRIGGER_BATCH_CONCURRENCY", "20"))
+TRIGGER_BATCH_DRAIN_SECONDS = float(os.getenv("TRIGGER_BATCH_DRAIN_SECONDS", "10"))
+
+# Bulk writes: max items per request and rows per statement; the whole
+# request is still one transaction
+EVENT_BULK_MAX_SIZE = int(os.getenv("EVENT_BULK_MAX_SIZE", "10000"))
+EVENT_BULK_CHUNK_SIZE = int(os.getenv("EVENT_BULK_CHUNK_SIZE", "1000"))
+# Import errors listed in the report; all of them are counted
+EVENT_IMPORT_MAX_ERRORS = int(os.getenv("EVENT_IMPORT_MAX_ERRORS", "1000"))
+
+# Exported fields, in CSV column order
+EXPORT_FIELDS = list(EventResponse.model_fields)
+# Only the columns of EventResponse, for listings encoded straight from rows
+EVENT_RESPONSE_COLUMNS = serialization.schema_columns(Event, EventResponse)
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _read_records(text: IO[str], format: DataFormat) -> Iterator[Tuple[int, Any]]:
+    """Yields (line number, raw record) of an uploaded file, one at a time."""
+    if format == DataFormat.CSV:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty cells take the field's default; surplus cells are an error
+            yield reader.line_num, {
+                key: value for key, value in row.items() if value != "" or key is None
+            }
+    else:
+        for number, line in enumerate(text, 1):
+            if line.strip():
+                yield number, line
+
+
+def _parse_chunk(
+    records: Iterator[Tuple[int, Any]], format: DataFormat, size: int
+) -> Tuple[List[EventCreate], List[EventImportError], bool]:
+    """
+    Reads and validates up to `size` records.
+
+    Returns the valid events, the errors, and whether the file is exhausted.
+    """
+    events: List[EventCreate] = []
+    errors: List[EventImportError] = []
+
+    for number, record in records:
+        try:
+            if format == DataFormat.CSV:
+                if None in record:
+                    raise ValueError("More cells than header columns")
+                events.append(EventCreate.model_validate(record))
+            else:
+                events.append(EventCreate.model_validate_json(record))
+        except ValidationError as e:
+            errors.append(EventImportError(line=number, error=_validation_message(e)))
+        except (ValueError, csv.Error) as e:
+            errors.append(EventImportError(line=number, error=str(e)))
+
+        if len(events) + len(errors) >= size:
+            return events, errors, False
+
+    return events, errors, True
 
 
 class EventService:
 
+    @staticmethod
+    def _definition(event: EventCreate) -> Dict[str, Any]:
+        """Column values of an event as defined by the user."""
+        return {
+            "name": event.name,
+            "event_type": event.event_type,
+            "destination": event.destination,
+            "method_type": event.method_type,
+            "payload": event.payload,
+            "is_test": event.is_test,
+            "max_retries": event.max_retries,
+            "retry_backoff_seconds": event.retry_backoff_seconds,
+            "timeout_seconds": event.timeout_seconds,
+            "max_in_flight": event.max_in_flight,
+            "rate_limit_per_second": event.rate_limit_per_second,
+            "interval_minutes": (
+                event.interval_minutes if event.event_type == EventType.INTERVAL else None
+            ),
+            "fixed_time": (
+                event.fixed_time if event.event_type == EventType.FIXED_TIME else None
+            ),
+        }
+
     @staticmethod
     async def create_event(
         user_id: int, event: EventCreate, db: AsyncSession
     ) -> EventResponse:
         """Create an event and stores it in the database."""
+        now = datetime.utcnow()
 
-        new_event = Event(
-            creator_id=user_id,
-            name=event.name,
-            event_type=event.event_type,
-            destination=event.destination,
-            method_type=event.method_type,
-            payload=event.payload,
-            is_test=event.is_test,
-            interval_minutes=(
-                event.interval_minutes
-                if event.event_type == EventType.INTERVAL
-                else None
-            ),
-            fixed_time=(
-                event.fixed_time if event.event_type == EventType.FIXED_TIME else None
-            ),
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+        # One INSERT ... RETURNING, nothing to refresh after the commit
+        new_event = await db.scalar(
+            insert(Event)
+            .values(
+                creator_id=user_id,
+                **EventService._definition(event),
+                next_run_at=first_run_at(
+                    event.event_type, event.interval_minutes, event.fixed_time, now, now
+                ),
+                created_at=now,
+                updated_at=now,
+            )
+            .returning(Event)
         )
-        db.add(new_event)
         await db.commit()
-        await db.refresh(new_event)
+        event_cache.invalidate(user_id)
+        scheduler.schedule(new_event)
         return EventResponse.model_validate(new_event)
 
     @staticmethod
-    async def get_all_events(user_id: int, db: AsyncSession) -> List[EventResponse]:
-        """Get all events in the database."""
+    async def get_all_events(
+        user_id: int, db: AsyncSession, if_none_match: Optional[str] = None
+    ) -> Tuple[str, Optional[bytes]]:
+        """
+        Get all of a user's events as JSON, along with its ETag.
+
+        Only the count and latest `updated_at` are read when the listing is
+        unchanged: no body is returned if `if_none_match` names the ETag, and
+        the cached one is returned otherwise.
+        """
+
+        count, last_updated_at = (
+            await db.execute(
+                select(func.count(), func.max(Event.updated_at)).where(
+                    Event.creator_id == user_id
+                )
+            )
+        ).one()
+        etag = make_etag(count, last_updated_at)
+        if etag_matches(if_none_match, etag):
+            return etag, None
 
-        result = await db.execute(select(Event).where(Event.creator_id == user_id))
-        events = result.scalars().all()
-        return [EventResponse.model_validate(event) for event in events]
+        body = event_cache.get(user_id, etag)
+        if body is None:
+            result = await db.execute(
+                select(*EVENT_RESPONSE_COLUMNS)
+                .where(Event.creator_id == user_id)
+                .order_by(Event.id)
+            )
+            events = serialization.as_dicts(result)
+            body = serialization.dumps(events)
+            # Tagged by what was read, which may be newer than the count above
+            etag = make_etag(
+                len(events), max((event["updated_at"] for event in events), default=None)
+            )
+            event_cache.put(user_id, etag, body)
+        return etag, body
 
     @staticmethod
-    async def get_event(event_id: int, user_id: int, db: AsyncSession) -> EventResponse:
-        """Fetches an event by id"""
+    async def get_event(
+        event_id: int, user_id: int, db: AsyncSession, if_none_match: Optional[str] = None
+    ) -> Tuple[str, Optional[EventResponse]]:
+        """Fetches an event by id along with its ETag; no event if `if_none_match` names it"""
 
         event = await db.get(Event, event_id)
 
@@ -67,42 +232,46 @@ class EventService:
                 status_code=401, detail="You can only view your created events!"
             )
 
-        return EventResponse.model_validate(event)
+        etag = make_etag(1, event.updated_at)
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        return etag, EventResponse.model_validate(event)
 
     @staticmethod
     async def update_event(
         event_id: int, user_id: int, updated_event: EventCreate, db: AsyncSession
     ) -> EventResponse:
         """Update an event by id"""
-        event = await db.get(Event, event_id)
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
+        now = datetime.utcnow()
+        definition = EventService._definition(updated_event)
 
-        if event.creator_id != user_id:
+        # One UPDATE ... RETURNING of an owned event; only a miss reads more
+        event = await db.scalar(
+            update(Event)
+            .where(Event.id == event_id, Event.creator_id == user_id)
+            .values(
+                **definition,
+                updated_at=now,
+                next_run_at=rescheduled_run_at(
+                    updated_event.event_type,
+                    definition["interval_minutes"],
+                    definition["fixed_time"],
+                    now,
+                ),
+            )
+            .returning(Event)
+        )
+        if event is None:
+            exists = await db.scalar(select(Event.id).where(Event.id == event_id))
+            if not exists:
+                raise HTTPException(status_code=404, detail="Event not found")
             raise HTTPException(
                 status_code=403, detail="You are not authorized to update this event"
             )
 
-        event.name = updated_event.name
-        event.event_type = updated_event.event_type
-        event.destination = updated_event.destination
-        event.method_type = updated_event.method_type
-        event.payload = updated_event.payload
-        event.is_test = updated_event.is_test
-        event.interval_minutes = (
-            updated_event.interval_minutes
-            if updated_event.event_type == EventType.INTERVAL
-            else None
-        )
-        event.fixed_time = (
-            updated_event.fixed_time
-            if updated_event.event_type == EventType.FIXED_TIME
-            else None
-        )
-        event.updated_at = datetime.utcnow()
-
         await db.commit()
-        await db.refresh(event)
+        event_cache.invalidate(user_id)
+        scheduler.schedule(event)
         return EventResponse.model_validate(event)
 
     @staticmethod
@@ -121,8 +290,298 @@ class EventService:
 
         await db.delete(event)
         await db.commit()
+        event_cache.invalidate(user_id)
+        scheduler.unschedule(event_id)
         return {"message": f"Event {event_id} deleted successfully"}
 
+    @staticmethod
+    def _check_bulk_size(count: int) -> None:
+        if count > EVENT_BULK_MAX_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {EVENT_BULK_MAX_SIZE} events can be written at once",
+            )
+
+    @staticmethod
+    async def _owners(event_ids: List[int], db: AsyncSession) -> Dict[int, Any]:
+        """Fetches creator and scheduling fields of the given events, by id."""
+        owners = {}
+        for chunk in _chunks(event_ids, EVENT_BULK_CHUNK_SIZE):
+            result = await db.execute(
+                select(Event.id, Event.creator_id, Event.event_type, Event.created_at).where(
+                    Event.id.in_(chunk)
+                )
+            )
+            owners.update((row.id, row) for row in result)
+        return owners
+
+    @staticmethod
+    async def _insert_events(
+        user_id: int, events: Sequence[EventCreate], db: AsyncSession
+    ) -> List[Event]:
+        """Inserts events with one multi-row `INSERT ... RETURNING`, without committing."""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "creator_id": user_id,
+                **EventService._definition(event),
+                "next_run_at": first_run_at(
+                    event.event_type, event.interval_minutes, event.fixed_time, now, now
+                ),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for event in events
+        ]
+        result = await db.scalars(
+            insert(Event).returning(Event, sort_by_parameter_order=True), rows
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def bulk_create_events(
+        user_id: int, events: List[EventCreate], db: AsyncSession
+    ) -> List[EventBulkResult]:
+        """Creates events with multi-row `INSERT ... RETURNING`, all in one transaction."""
+        EventService._check_bulk_size(len(events))
+
+        created: List[Event] = []
+        try:
+            for chunk in _chunks(events, EVENT_BULK_CHUNK_SIZE):
+                created.extend(await EventService._insert_events(user_id, chunk, db))
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=500, detail=f"Failed to create events: {str(e)}"
+            )
+
+        event_cache.invalidate(user_id)
+        for event in created:
+            scheduler.schedule(event)
+        return [EventBulkResult(id=event.id, status_code=201) for event in created]
+
+    @staticmethod
+    async def bulk_update_events(
+        user_id: int, updates: List[EventBulkUpdate], db: AsyncSession
+    ) -> List[EventBulkResult]:
+        """
+        Updates events by id in one transaction.
+
+        Ownership of all of them is checked up front; events that are missing
+        or not yours are reported and skipped, the others are written with
+        one executemany per chunk.
+        """
+        EventService._check_bulk_size(len(updates))
+
+        owners = await EventService._owners([update.id for update in updates], db)
+        now = datetime.utcnow()
+        results: List[EventBulkResult] = []
+        # Rows keeping their due time leave next_run_at out, so a concurrent
+        # firing is not overwritten; executemany needs the same keys per batch
+        rescheduled: List[Dict[str, Any]] = []
+        kept: List[Dict[str, Any]] = []
+        seen = set()
+
+        for item in updates:
+            current = owners.get(item.id)
+            if item.id in seen:
+                results.append(
+                    EventBulkResult(id=item.id, status_code=400, detail="Duplicate event id")
+                )
+                continue
+            seen.add(item.id)
+
+            if current is None:
+                results.append(
+                    EventBulkResult(id=item.id, status_code=404, detail="Event not found")
+                )
+                continue
+            if current.creator_id != user_id:
+                results.append(
+                    EventBulkResult(
+                        id=item.id,
+                        status_code=403,
+                        detail="You are not authorized to update this event",
+                    )
+                )
+                continue
+
+            row = {"id": item.id, **EventService._definition(item), "updated_at": now}
+            # A pending ONE_TIME event keeps its due time, a fired one is not re-armed
+            if (
+                current.event_type == EventType.ONE_TIME
+                and item.event_type == EventType.ONE_TIME
+            ):
+                kept.append(row)
+            else:
+                row["next_run_at"] = first_run_at(
+                    item.event_type,
+                    row["interval_minutes"],
+                    row["fixed_time"],
+                    current.created_at,
+                    now,
+                )
+                rescheduled.append(row)
+            results.append(EventBulkResult(id=item.id, status_code=200))
+
+        updated_ids = [row["id"] for row in rescheduled + kept]
+        schedules = []
+        try:
+            for rows in (rescheduled, kept):
+                for chunk in _chunks(rows, EVENT_BULK_CHUNK_SIZE):
+                    await db.execute(update(Event), chunk)
+            for chunk in _chunks(updated_ids, EVENT_BULK_CHUNK_SIZE):
+                result = await db.execute(
+                    select(*SCHEDULED_COLUMNS).where(Event.id.in_(chunk))
+                )
+                schedules.extend(result.all())
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=500, detail=f"Failed to update events: {str(e)}"
+            )
+
+        event_cache.invalidate(user_id)
+        for row in schedules:
+            scheduler.schedule(row)
+        return results
+
+    @staticmethod
+    async def bulk_delete_events(
+        user_id: int, event_ids: List[int], db: AsyncSession
+    ) -> List[EventBulkResult]:
+        """Deletes events by id in one transaction, after one ownership check."""
+        event_ids = list(dict.fromkeys(event_ids))
+        EventService._check_bulk_size(len(event_ids))
+
+        owners = await EventService._owners(event_ids, db)
+        results: List[EventBulkResult] = []
+        owned: List[int] = []
+
+        for event_id in event_ids:
+            current = owners.get(event_id)
+            if current is None:
+                results.append(
+                    EventBulkResult(id=event_id, status_code=404, detail="Event not found")
+                )
+            elif current.creator_id != user_id:
+                results.append(
+                    EventBulkResult(
+                        id=event_id,
+                        status_code=403,
+                        detail="You are not authorized to delete this event",
+                    )
+                )
+            else:
+                owned.append(event_id)
+                results.append(EventBulkResult(id=event_id, status_code=200))
+
+        try:
+            for chunk in _chunks(owned, EVENT_BULK_CHUNK_SIZE):
+                await db.execute(delete(Event).where(Event.id.in_(chunk)))
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=500, detail=f"Failed to delete events: {str(e)}"
+            )
+
+        event_cache.invalidate(user_id)
+        for event_id in owned:
+            scheduler.unschedule(event_id)
+        return results
+
+    @staticmethod
+    async def export_events(user_id: int, format: DataFormat) -> AsyncIterator[str]:
+        """
+        Streams all of a user's events as NDJSON lines or CSV rows, by id.
+
+        Rows are read through a server-side cursor in chunks of
+        `EVENT_BULK_CHUNK_SIZE`, so memory use does not depend on the count.
+        """
+        query = (
+            select(*EVENT_RESPONSE_COLUMNS)
+            .where(Event.creator_id == user_id)
+            .order_by(Event.id)
+            .execution_options(yield_per=EVENT_BULK_CHUNK_SIZE)
+        )
+
+        # The request session is closed once streaming starts, so use a fresh one
+        async with async_session_maker() as db:
+            result = await db.stream(query)
+            if format == DataFormat.CSV:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_FIELDS)
+                async for rows in result.partitions():
+                    for row in rows:
+                        event = EventResponse.model_validate(row._asdict())
+                        values = event.model_dump(mode="json")
+                        writer.writerow(values[name] for name in EXPORT_FIELDS)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            else:
+                async for rows in result.partitions():
+                    yield "".join(
+                        EventResponse.model_validate(row._asdict()).model_dump_json() + "\n"
+                        for row in rows
+                    )
+
+    @staticmethod
+    async def import_events(
+        user_id: int, file: IO[bytes], format: DataFormat, db: AsyncSession
+    ) -> EventImportReport:
+        """
+        Creates events from an uploaded NDJSON or CSV file.
+
+        The file is read and validated `EVENT_BULK_CHUNK_SIZE` records at a
+        time, off the event loop, and each chunk of valid events is inserted
+        and committed on its own, so memory use does not depend on the file
+        size. Invalid records are reported by line and skipped.
+        """
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        records = _read_records(text, format)
+        report = EventImportReport(imported=0, failed=0, errors=[])
+
+        done = False
+        while not done:
+            try:
+                events, errors, done = await run_in_threadpool(
+                    _parse_chunk, records, format, EVENT_BULK_CHUNK_SIZE
+                )
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unreadable file after {report.imported} imported events: {e}",
+                )
+
+            report.failed += len(errors)
+            room = EVENT_IMPORT_MAX_ERRORS - len(report.errors)
+            report.errors.extend(errors[: max(room, 0)])
+            if not events:
+                continue
+
+            try:
+                created = await EventService._insert_events(user_id, events, db)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to store events after {report.imported} imported: {str(e)}",
+                )
+
+            event_cache.invalidate(user_id)
+            for event in created:
+                scheduler.schedule(event)
+            report.imported += len(created)
+            db.expunge_all()
+
+        return report
+
     @staticmethod
     async def trigger_event(
         event_id: int, user_id: int, db: AsyncSession
@@ -147,37 +606,152 @@ class EventService:
                 status_code=403, detail="You can only trigger your created events"
             )
 
-        method = event.method_type
-        url = event.destination
-        payload = event.payload
+        return await DispatchService.dispatch(event, db)
+
+    @staticmethod
+    async def trigger_events(
+        event_ids: List[int], user_id: int, db: AsyncSession
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Triggers several events concurrently and logs all responses in one transaction.
+
+        Ownership is checked with a single query before anything is sent.
+
+        Returns:
+            An async iterator yielding one result per event as soon as its
+            request finishes, followed by the number of stored logs (or an
+            error line if they could not be stored).
+        """
+        event_ids = list(dict.fromkeys(event_ids))
+        if len(event_ids) > TRIGGER_BATCH_MAX_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {TRIGGER_BATCH_MAX_SIZE} events can be triggered at once",
+            )
+
+        result = await db.execute(select(Event).where(Event.id.in_(event_ids)))
+        events = {event.id: event for event in result.scalars().all()}
+
+        return EventService._trigger_batch(event_ids, events, user_id)
+
+    @staticmethod
+    async def _trigger_batch(
+        event_ids: List[int], events: Dict[int, Event], user_id: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        errors = []
+        sendable = []
+        for event_id in event_ids:
+            event = events.get(event_id)
+            if not event:
+                errors.append(
+                    {"event_id": event_id, "status_code": 404, "detail": "Event not found"}
+                )
+            elif event.creator_id != user_id:
+                errors.append(
+                    {
+                        "event_id": event_id,
+                        "status_code": 403,
+                        "detail": "You can only trigger your created events",
+                    }
+                )
+            else:
+                sendable.append(event)
+
+        # The batch runs in its own task, so a client going away does not
+        # stop it before its logs are written; the stream only relays results
+        results: asyncio.Queue = asyncio.Queue()
+        trigger_batches.spawn(EventService._run_batch(sendable, results))
+
+        for error in errors:
+            yield error
+        while True:
+            result = await results.get()
+            if result is None:
+                break
+            yield result
 
-        response_text = "Request failed"
-        response_status = 500  # Default to server error
+    @staticmethod
+    async def _run_batch(events: List[Event], results: asyncio.Queue) -> None:
+        """Sends a batch, queueing each result, then stores every log in one transaction."""
+        semaphore = asyncio.Semaphore(TRIGGER_BATCH_CONCURRENCY)
+        deadline = time.monotonic() + DISPATCH_TRIGGER_MAX_SECONDS
+        logs: List[LogCreate] = []
+
+        async def send(event: Event) -> Dict[str, Any]:
+            attempt = 1
+            while True:
+                # Held only while the request runs, not while queued or backing off
+                try:
+                    log = await DispatchService.send(event, attempt, semaphore, deadline)
+                except HTTPException as e:
+                    return {
+                        "event_id": event.id,
+                        "status_code": e.status_code,
+                        "detail": e.detail,
+                    }
+
+                logs.append(log)
+                delay = DispatchService.retry_delay(event, log, deadline)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+                attempt += 1
+
+            return {
+                "event_id": event.id,
+                "response_status_code": log.response_status_code,
+                "duration_ms": log.duration_ms,
+                "attempts": attempt,
+            }
 
-        async with httpx.AsyncClient() as client:
+        sends = [asyncio.create_task(send(event)) for event in events]
+        try:
+            for outcome in asyncio.as_completed(sends):
+                results.put_nowait(await outcome)
+        finally:
+            # Only left running when the batch is cancelled at shutdown
+            for task in sends:
+                task.cancel()
+
+            # Whatever was sent is logged, also when cancelled at shutdown
             try:
-                if method == MethodType.GET:
-                    response = await client.get(url)
-                elif method == MethodType.POST:
-                    response = await client.post(url, json=payload)
-                elif method == MethodType.PUT:
-                    response = await client.put(url, json=payload)
-                elif method == MethodType.DELETE:
-                    response = await client.delete(url)
-                else:
-                    raise HTTPException(status_code=400, detail="Unsupported method")
-
-                # Update response details on success
-                response_text = response.text
-                response_status = response.status_code
-
-            # Handling request failure (network issue, invalid URL, etc.)
-            except httpx.RequestError as e:
-                print(f"Exception occurred: {e}")
-                response_text = str(e)
-
-        # Logging the response
-        log_entry = await LogService.create_log(
-            event_id, response_text, response_status, db
-        )
-        return log_entry
+                async with async_session_maker() as db:
+                    stored = await LogService.create_logs(logs, db)
+                results.put_nowait({"logged": len(stored)})
+            except HTTPException as e:
+                results.put_nowait({"status_code": e.status_code, "detail": e.detail})
+            results.put_nowait(None)
+
+
+class TriggerBatches:
+    """
+    Batch triggers still running, each in its own task.
+
+    Stopped by the app lifespan before the HTTP client and the log writer:
+    batches get `TRIGGER_BATCH_DRAIN_SECONDS` to finish, the rest are
+    cancelled and still store the logs of what they sent.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    def spawn(self, batch: Awaitable[None]) -> None:
+        task = asyncio.create_task(batch)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self, timeout: float = TRIGGER_BATCH_DRAIN_SECONDS) -> None:
+        if not self._tasks:
+            return
+
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+trigger_batches = TriggerBatches()
@@ -0,0 +1,520 @@
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+
+import httpcore
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Connection pool sizing shared by every outbound webhook
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "500"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "100"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+# Limits per destination host: requests in flight and requests started per
+# second (0 for no rate limit). Events can set tighter ones of their own
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "50"))
+HTTP_RATE_LIMIT_PER_HOST = float(os.getenv("HTTP_RATE_LIMIT_PER_HOST", "0"))
+# Limits of hosts unused for this long are dropped
+HTTP_HOST_IDLE_SECONDS = float(os.getenv("HTTP_HOST_IDLE_SECONDS", "300"))
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+HTTP_DNS_CACHE_TTL = float(os.getenv("HTTP_DNS_CACHE_TTL", "60"))
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_WRITE_TIMEOUT = float(os.getenv("HTTP_WRITE_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+
+logger = logging.getLogger(__name__)
+
+# httpcore trace events (without the .started/.complete suffix) per phase
+_TRACE_PHASES = {
+    "connection.connect_tcp": "connect_ms",
+    "connection.start_tls": "tls_ms",
+    "http11.send_request_headers": "send_ms",
+    "http11.send_request_body": "send_ms",
+    "http2.send_request_headers": "send_ms",
+    "http2.send_request_body": "send_ms",
+    "http11.receive_response_headers": "ttfb_ms",
+    "http2.receive_response_headers": "ttfb_ms",
+    "http11.receive_response_body": "receive_ms",
+    "http2.receive_response_body": "receive_ms",
+}
+
+
+class RequestTimings:
+    """
+    Time spent in each phase of one outbound request, in milliseconds.
+
+    Filled in by httpcore's `trace` extension, except DNS which resolves
+    inside our network backend and is recorded through `_current_timings`.
+    A phase that did not happen (e.g. connect on a reused connection) stays
+    None. `ttfb_ms` runs from the request being sent to the response headers.
+    """
+
+    __slots__ = (
+        "dns_ms", "connect_ms", "tls_ms", "send_ms", "ttfb_ms", "receive_ms", "_started"
+    )
+
+    def __init__(self):
+        self.dns_ms: Optional[float] = None
+        self.connect_ms: Optional[float] = None
+        self.tls_ms: Optional[float] = None
+        self.send_ms: Optional[float] = None
+        self.ttfb_ms: Optional[float] = None
+        self.receive_ms: Optional[float] = None
+        self._started: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        setattr(self, phase, (getattr(self, phase) or 0.0) + seconds * 1000)
+
+    async def trace(self, event: str, info: Dict[str, Any]) -> None:
+        name, _, stage = event.rpartition(".")
+        phase = _TRACE_PHASES.get(name)
+        if phase is None:
+            return
+
+        if stage == "started":
+            self._started[phase] = time.perf_counter()
+        elif phase in self._started:  # complete or failed
+            self.add(phase, time.perf_counter() - self._started.pop(phase))
+
+    def as_dict(self) -> Dict[str, Optional[float]]:
+        connect_ms = self.connect_ms
+        # connect_tcp of our backend includes the lookup
+        if connect_ms is not None and self.dns_ms is not None:
+            connect_ms = max(connect_ms - self.dns_ms, 0.0)
+        return {
+            "dns_ms": self.dns_ms,
+            "connect_ms": connect_ms,
+            "tls_ms": self.tls_ms,
+            "send_ms": self.send_ms,
+            "ttfb_ms": self.ttfb_ms,
+            "receive_ms": self.receive_ms,
+        }
+
+
+# Timings of the request being sent by the current task, if it records them
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that caches resolved addresses for `ttl` seconds.
+
+    httpcore resolves the host on every new connection; with this backend
+    the lookup happens once per TTL. TLS still verifies against the
+    original hostname since httpcore passes it separately to `start_tls`.
+    """
+
+    def __init__(self, ttl: float, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._ttl = ttl
+        self._backend = backend or httpcore.AnyIOBackend()
+        self._cache: Dict[str, Tuple[float, List[str]]] = {}
+        self.connections_opened = 0
+        self.dns_lookups = 0
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        cached = self._cache.get(host)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        self.dns_lookups += 1
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, port, type=socket.SOCK_STREAM
+            )
+        except socket.gaierror as exc:
+            raise httpcore.ConnectError(str(exc)) from exc
+
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[host] = (time.monotonic() + self._ttl, addresses)
+        return addresses
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Any = None,
+    ) -> httpcore.AsyncNetworkStream:
+        error: Optional[Exception] = None
+
+        start = time.perf_counter()
+        try:
+            addresses = await self._resolve(host, port)
+        finally:
+            timings = _current_timings.get()
+            if timings is not None:
+                timings.add("dns_ms", time.perf_counter() - start)
+
+        # The caller's timeout bounds all the addresses together, not each one
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for address in addresses:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    error = httpcore.ConnectTimeout(f"Timed out connecting to {host}")
+                    break
+            try:
+                stream = await self._backend.connect_tcp(
+                    address, port, remaining, local_address, socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                error = exc
+                continue
+
+            self.connections_opened += 1
+            return stream
+
+        # None of the cached addresses answered, resolve again next time
+        self._cache.pop(host, None)
+        raise error or httpcore.ConnectError(f"No address found for {host}")
+
+    async def connect_unix_socket(
+        self, path: str, timeout: Optional[float] = None, socket_options: Any = None
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class AdmissionTimeout(Exception):
+    """A request was still waiting for its host's limits at its deadline."""
+
+
+class HostLimiter:
+    """
+    First-come, first-served admission of requests to one destination.
+
+    At most `max_in_flight` admitted requests at once and, with a `rate`,
+    a token bucket refilled at `rate` per second holding up to one second
+    of tokens. Requests over the limits wait in a queue instead of failing.
+    """
+
+    def __init__(self, max_in_flight: int, rate: Optional[float]):
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.in_flight = 0
+        self._capacity = max(1.0, rate or 0.0)
+        self._tokens = self._capacity
+        self._refilled_at = self._used_at = time.monotonic()
+        self._waiters: deque = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queued(self) -> int:
+        return sum(not waiter.done() for waiter in self._waiters)
+
+    def expired(self, idle_seconds: float) -> bool:
+        """Whether nothing used the limiter for `idle_seconds` and its bucket is full again."""
+        if self.in_flight or self.queued:
+            return False
+        if time.monotonic() - self._used_at < idle_seconds:
+            return False
+        if self.rate:
+            self._refill()
+            return self._tokens >= self._capacity
+        return True
+
+    async def acquire(self) -> None:
+        self._used_at = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._admit()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Admitted right as the caller was cancelled: hand the slot back
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self._used_at = time.monotonic()
+        self.in_flight -= 1
+        self._admit()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._refilled_at) * self.rate
+        )
+        self._refilled_at = now
+
+    def _admit(self) -> None:
+        """Admits waiters in arrival order for as long as the limits allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.rate:
+            self._refill()
+
+        while self._waiters and self.in_flight < self.max_in_flight:
+            waiter = self._waiters[0]
+            if waiter.done():  # Cancelled while queued
+                self._waiters.popleft()
+                continue
+            if self.rate:
+                if self._tokens < 1:
+                    # Wake up when the next token is due
+                    self._timer = asyncio.get_running_loop().call_later(
+                        (1 - self._tokens) / self.rate, self._admit
+                    )
+                    return
+                self._tokens -= 1
+
+            self._waiters.popleft()
+            self.in_flight += 1
+            waiter.set_result(None)
+
+
+class HttpDispatcher:
+    """
+    Long-lived HTTP client used for every outbound event request.
+
+    Keeps connections alive between triggers, limits concurrency and rate
+    per destination host and caches DNS lookups. Started and closed by the
+    app lifespan; created lazily if used outside of it.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._backend: Optional[CachingDNSBackend] = None
+        # One budget per host, shared by every request to it
+        self._limiters: Dict[str, HostLimiter] = {}
+        # Events' own limits, applied on top: keyed by host and limits, so
+        # events to one host with the same values share them
+        self._event_limiters: Dict[Tuple[str, int, Optional[float]], HostLimiter] = {}
+        self._next_eviction = time.monotonic() + HTTP_HOST_IDLE_SECONDS
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+
+        http2 = HTTP2_ENABLED
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP2_ENABLED is set but `h2` is not installed, using HTTP/1.1")
+                http2 = False
+
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        # httpx does not take a network backend, so hand ours to its connection
+        # pool; a private attribute, which is why httpcore is pinned
+        self._backend = CachingDNSBackend(HTTP_DNS_CACHE_TTL)
+        transport._pool._network_backend = self._backend
+
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(
+                connect=HTTP_CONNECT_TIMEOUT,
+                read=HTTP_READ_TIMEOUT,
+                write=HTTP_WRITE_TIMEOUT,
+                pool=HTTP_POOL_TIMEOUT,
+            ),
+        )
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _evict_idle(self) -> None:
+        """Drops the limiters of hosts no longer sent to, at most once per idle period."""
+        now = time.monotonic()
+        if now < self._next_eviction:
+            return
+        self._next_eviction = now + HTTP_HOST_IDLE_SECONDS
+
+        for limiters in (self._limiters, self._event_limiters):
+            idle = [
+                key
+                for key, limiter in limiters.items()
+                if limiter.expired(HTTP_HOST_IDLE_SECONDS)
+            ]
+            for key in idle:
+                del limiters[key]
+
+    def _limiter(self, host: str) -> HostLimiter:
+        self._evict_idle()
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = HostLimiter(
+                HTTP_MAX_CONNECTIONS_PER_HOST, HTTP_RATE_LIMIT_PER_HOST or None
+            )
+        return limiter
+
+    def _event_limiter(
+        self, host: str, max_in_flight: Optional[int], rate: Optional[float]
+    ) -> Optional[HostLimiter]:
+        if not max_in_flight and not rate:
+            return None
+
+        self._evict_idle()
+        key = (host, max_in_flight or HTTP_MAX_CONNECTIONS_PER_HOST, rate or None)
+        limiter = self._event_limiters.get(key)
+        if limiter is None:
+            limiter = self._event_limiters[key] = HostLimiter(key[1], key[2])
+        return limiter
+
+    @staticmethod
+    async def _wait(acquire: Awaitable[Any], deadline: Optional[float]) -> None:
+        if deadline is None:
+            await acquire
+            return
+        try:
+            await asyncio.wait_for(acquire, deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            raise AdmissionTimeout("Request not admitted before its deadline") from None
+
+    @asynccontextmanager
+    async def _admit(
+        self,
+        url: str,
+        max_in_flight: Optional[int],
+        rate: Optional[float],
+        slots: Optional[asyncio.Semaphore],
+        deadline: Optional[float],
+    ) -> AsyncIterator[None]:
+        host = httpx.URL(url).host
+        held: List[HostLimiter] = []
+        holds_slot = False
+        try:
+            # The event's own limits first, so requests held back by them do
+            # not take places in the host's queue
+            limiter = self._event_limiter(host, max_in_flight, rate)
+            if limiter is not None:
+                await self._wait(limiter.acquire(), deadline)
+                held.append(limiter)
+
+            # Looked up only now: an idle host's limiter may have been evicted meanwhile
+            limiter = self._limiter(host)
+            await self._wait(limiter.acquire(), deadline)
+            held.append(limiter)
+
+            # Taken only once the host admits the request, so callers' slots
+            # are not held up by a queue at one busy host
+            if slots is not None:
+                await self._wait(slots.acquire(), deadline)
+                holds_slot = True
+            yield
+        finally:
+            if holds_slot:
+                slots.release()
+            for limiter in reversed(held):
+                limiter.release()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        max_in_flight: Optional[int] = None,
+        rate: Optional[float] = None,
+        slots: Optional[asyncio.Semaphore] = None,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Sends a request through the shared pool, within the destination host limits.
+
+        `max_in_flight` and `rate` are the caller's own limits, applied
+        within the host's; `slots` is an extra semaphore held only while the
+        request runs. With a `deadline` (`time.monotonic()`), raises
+        `AdmissionTimeout` if the request is still queued by then.
+        """
+        if self._client is None:
+            await self.start()
+
+        async with self._admit(url, max_in_flight, rate, slots, deadline):
+            return await self._client.request(method, url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        timings: Optional[RequestTimings] = None,
+        max_in_flight: Optional[int] = None,
+        rate: Optional[float] = None,
+        slots: Optional[asyncio.Semaphore] = None,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Like `request`, but leaves the body unread so it can be consumed in chunks.
+
+        Pass `timings` to have the phases of the request recorded into it.
+        """
+        if self._client is None:
+            await self.start()
+
+        token = None
+        if timings is not None:
+            kwargs["extensions"] = {**kwargs.get("extensions", {}), "trace": timings.trace}
+            token = _current_timings.set(timings)
+
+        try:
+            async with self._admit(url, max_in_flight, rate, slots, deadline):
+                async with self._client.stream(method, url, **kwargs) as response:
+                    yield response
+        finally:
+            if token is not None:
+                _current_timings.reset(token)
+
+    def host_stats(self) -> Dict[str, Dict[str, int]]:
+        """Requests in flight and waiting for admission, per destination host."""
+        hosts = {
+            host: {"in_flight": limiter.in_flight, "queued": limiter.queued}
+            for host, limiter in self._limiters.items()
+        }
+        # Held back by their event's limits, so not yet in the host's queue
+        for (host, _, _), limiter in self._event_limiters.items():
+            if limiter.queued:
+                stats = hosts.setdefault(host, {"in_flight": 0, "queued": 0})
+                stats["queued"] += limiter.queued
+        return hosts
+
+    def stats(self) -> Dict[str, int]:
+        backend = self._backend
+        return {
+            "connections_opened": backend.connections_opened if backend else 0,
+            "dns_lookups": backend.dns_lookups if backend else 0,
+            "in_flight": sum(limiter.in_flight for limiter in self._limiters.values()),
+            "queued": sum(
+                limiter.queued
+                for limiters in (self._limiters, self._event_limiters)
+                for limiter in limiters.values()
+            ),
+        }
+
+
+http_dispatcher = HttpDispatcher()
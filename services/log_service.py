@@ -1,36 +1,74 @@
+import base64
+import os
+import time
+import zlib
 from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+from dotenv import load_dotenv
 from fastapi import HTTPException
+from sqlalchemy import Select, func, insert, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import undefer
 
+import metrics
+import serialization
+from db.database import async_session_maker
 from db.enums import LogStatus
 from db.models.event_model import Event
-from db.models.log_model import Log
-from db.schemas.log_schema import LogResponse, LogsFilterByEventResponse
+from db.models.log_model import Log, LogArchive
+from db.schemas.log_schema import (
+    LogCreate,
+    LogDetailResponse,
+    LogFilter,
+    LogResponse,
+)
+from services.log_writer import log_writer
+
+load_dotenv()
+
+# Default page size of log listings and rows fetched per export round trip
+LOGS_PAGE_SIZE = int(os.getenv("LOGS_PAGE_SIZE", "100"))
+LOGS_EXPORT_CHUNK_SIZE = int(os.getenv("LOGS_EXPORT_CHUNK_SIZE", "1000"))
+
+# Only the columns of LogResponse; the stored response body stays on disk
+LOG_RESPONSE_COLUMNS = serialization.schema_columns(Log, LogResponse)
 
 
 class LogService:
 
     @staticmethod
-    async def create_log(
-        event_id: int, response_text: str, response_status: int, db: AsyncSession
-    ) -> LogResponse:
+    def _log_row(log: LogCreate, timestamp: datetime) -> dict:
+        return {
+            **log.model_dump(),
+            "timestamp": timestamp,
+            "status": LogStatus.ACTIVE,  # Default status
+        }
+
+    @staticmethod
+    async def create_log(log: LogCreate, db: AsyncSession) -> LogResponse:
         """Creates a log entry and stores it in the database."""
-        new_log = Log(
-            event_id=event_id,
-            response=response_text,
-            response_status_code=response_status,
-            timestamp=datetime.utcnow(),
-            status=LogStatus.ACTIVE,  # Default status
-        )
+        row = LogService._log_row(log, datetime.utcnow())
+        start = time.perf_counter()
+
+        # Coalesce into the buffered writer's next batch when it is running
+        if log_writer.running:
+            try:
+                new_log = await log_writer.write(row)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500, detail=f"Failed to store log: {str(e)}"
+                )
+            metrics.log_write_duration.observe(time.perf_counter() - start, "writer")
+            return new_log
 
         try:
-            db.add(new_log)
+            result = await db.scalars(insert(Log).values(**row).returning(Log))
+            new_log = LogResponse.model_validate(result.one())
             await db.commit()
-            await db.refresh(new_log)
-            return LogResponse.model_validate(new_log)
+            metrics.log_write_duration.observe(time.perf_counter() - start, "direct")
+            return new_log
         except Exception as e:
             await db.rollback()
             raise HTTPException(
@@ -38,30 +76,81 @@ class LogService:
             )
 
     @staticmethod
-    async def get_all_logs(user_id: int, db: AsyncSession) -> list[LogResponse]:
-        """Fetch all logs for the events you created."""
+    async def create_logs(logs: List[LogCreate], db: AsyncSession) -> List[LogResponse]:
+        """Stores several log entries in one transaction."""
+        if not logs:
+            return []
 
-        result = await db.execute(
-            select(Log)
-            .join(Event, Event.id == Log.event_id)
-            .where(Event.creator_id == user_id)
-            .options(joinedload(Log.event))
-        )
+        timestamp = datetime.utcnow()
+        rows = [LogService._log_row(log, timestamp) for log in logs]
+        start = time.perf_counter()
+
+        try:
+            result = await db.scalars(
+                insert(Log).returning(Log, sort_by_parameter_order=True), rows
+            )
+            new_logs = [LogResponse.model_validate(log) for log in result.all()]
+            await db.commit()
+            metrics.log_write_duration.observe(time.perf_counter() - start, "batch")
+            return new_logs
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=500, detail=f"Failed to store logs: {str(e)}"
+            )
 
-        logs = result.scalars().all()
+    @staticmethod
+    def _encode_cursor(log: Dict[str, Any]) -> str:
+        raw = f"{log['timestamp'].isoformat()}|{log['id']}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
 
-        if not logs:
-            raise HTTPException(status_code=404, detail="No logs found for this user.")
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(timestamp), int(log_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
 
-        return [LogResponse.model_validate(log) for log in logs]
+    @staticmethod
+    def _apply_filters(query: Select, filters: LogFilter) -> Select:
+        if filters.since:
+            query = query.where(Log.timestamp >= filters.since)
+        if filters.until:
+            query = query.where(Log.timestamp < filters.until)
+        if filters.status_code is not None:
+            query = query.where(Log.response_status_code == filters.status_code)
+        if filters.status_class is not None:
+            low = filters.status_class * 100
+            query = query.where(Log.response_status_code.between(low, low + 99))
+        return query
 
     @staticmethod
-    async def get_logs_with_count(
-        user_id: int, event_id: int, db: AsyncSession
-    ) -> LogsFilterByEventResponse:
-        """Fetch logs for an event along with their count."""
+    async def _fetch_page(
+        query: Select, limit: int, cursor: Optional[str], db: AsyncSession
+    ) -> serialization.RowsPage:
+        """Runs a keyset-paginated query of `LOG_RESPONSE_COLUMNS`, newest first."""
+        if cursor:
+            query = query.where(
+                tuple_(Log.timestamp, Log.id) < tuple_(*LogService._decode_cursor(cursor))
+            )
+
+        # Fetch one extra row to know whether another page exists
+        result = await db.execute(
+            query.order_by(Log.timestamp.desc(), Log.id.desc()).limit(limit + 1)
+        )
+        logs = serialization.as_dicts(result)
+
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = LogService._encode_cursor(logs[-1])
+
+        return serialization.RowsPage(logs, next_cursor)
 
-        # Checks if event is created by the user
+    @staticmethod
+    async def check_event_access(user_id: int, event_id: int, db: AsyncSession) -> None:
+        """Checks if event is created by the user"""
         event_exists = await db.execute(
             select(Event.id).where(Event.id == event_id, Event.creator_id == user_id)
         )
@@ -70,12 +159,131 @@ class LogService:
                 status_code=403, detail="You do not have access to this event."
             )
 
-        # Fetch logs for the given event_id
-        logs_result = await db.execute(select(Log).where(Log.event_id == event_id))
-        logs = logs_result.scalars().all()
+    @staticmethod
+    async def get_log(log_id: int, user_id: int, db: AsyncSession) -> LogDetailResponse:
+        """Fetch a single log with its full stored response body, archived or not."""
+
+        log = None
+        for model in (Log, LogArchive):
+            result = await db.execute(
+                select(model).options(undefer(model.response_body)).where(model.id == log_id)
+            )
+            log = result.scalar_one_or_none()
+            if log:
+                break
+
+        if not log:
+            raise HTTPException(status_code=404, detail="Log not found")
+
+        await LogService.check_event_access(user_id, log.event_id, db)
+
+        # Stored as received; bytes that are not UTF-8 text are shown replaced
+        body = log.response_body
+        return LogDetailResponse(
+            **LogResponse.model_validate(log).model_dump(),
+            response_body=(
+                zlib.decompress(body).decode(errors="replace") if body is not None else None
+            ),
+        )
+
+    @staticmethod
+    async def get_all_logs(
+        user_id: int,
+        db: AsyncSession,
+        filters: LogFilter = LogFilter(),
+        limit: int = LOGS_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> serialization.RowsPage:
+        """Fetch a page of logs for the events you created, as plain rows."""
 
-        return LogsFilterByEventResponse(
-            event_id=event_id,
-            logs_count=len(logs),
-            logs=[LogResponse.model_validate(log) for log in logs],  # Convert to schema
+        query = LogService._apply_filters(
+            select(*LOG_RESPONSE_COLUMNS)
+            .join(Event, Event.id == Log.event_id)
+            .where(Event.creator_id == user_id),
+            filters,
         )
+        page = await LogService._fetch_page(query, limit, cursor, db)
+
+        if not page.rows and not cursor:
+            raise HTTPException(status_code=404, detail="No logs found for this user.")
+
+        return page
+
+    @staticmethod
+    async def get_logs_with_count(
+        user_id: int,
+        event_id: int,
+        db: AsyncSession,
+        filters: LogFilter = LogFilter(),
+        limit: int = LOGS_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fetch a page of logs for an event along with their total count, as
+        the plain content of a `LogsFilterByEventResponse`.
+        """
+
+        await LogService.check_event_access(user_id, event_id, db)
+
+        count_query = LogService._apply_filters(
+            select(func.count()).select_from(Log).where(Log.event_id == event_id),
+            filters,
+        )
+        logs_count = (await db.execute(count_query)).scalar_one()
+
+        page = serialization.RowsPage([])
+        if logs_count:
+            query = LogService._apply_filters(
+                select(*LOG_RESPONSE_COLUMNS).where(Log.event_id == event_id), filters
+            )
+            page = await LogService._fetch_page(query, limit, cursor, db)
+
+        return {
+            "event_id": event_id,
+            "logs_count": logs_count,
+            "logs": page.rows,
+            "next_cursor": page.next_cursor,
+        }
+
+    @staticmethod
+    async def export_logs(
+        user_id: int,
+        db: AsyncSession,
+        filters: LogFilter = LogFilter(),
+        event_id: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Exports logs as NDJSON lines, newest first.
+
+        Rows are read through a server-side cursor in chunks of
+        `LOGS_EXPORT_CHUNK_SIZE`, so memory use does not depend on how many
+        logs match.
+        """
+        if event_id is not None:
+            await LogService.check_event_access(user_id, event_id, db)
+            query = select(Log).where(Log.event_id == event_id)
+        else:
+            query = (
+                select(Log)
+                .join(Event, Event.id == Log.event_id)
+                .where(Event.creator_id == user_id)
+            )
+
+        query = (
+            LogService._apply_filters(query, filters)
+            .order_by(Log.timestamp.desc(), Log.id.desc())
+            .execution_options(yield_per=LOGS_EXPORT_CHUNK_SIZE)
+        )
+        return LogService._stream_ndjson(query)
+
+    @staticmethod
+    async def _stream_ndjson(query: Select) -> AsyncIterator[str]:
+        # The request session is closed once streaming starts, so use a fresh one
+        async with async_session_maker() as db:
+            result = await db.stream_scalars(query)
+            async for logs in result.partitions():
+                yield "".join(
+                    LogResponse.model_validate(log).model_dump_json() + "\n"
+                    for log in logs
+                )
+                db.expunge_all()
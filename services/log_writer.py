@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import insert
+
+from db.database import async_session_maker
+from db.models.log_model import Log
+from db.schemas.log_schema import LogResponse
+
+load_dotenv()
+
+LOG_WRITER_ENABLED = os.getenv("LOG_WRITER_ENABLED", "false").lower() == "true"
+# Rows per INSERT, how long a batch may wait to fill up, and queued rows
+# before writers have to wait (backpressure)
+LOG_WRITER_BATCH_SIZE = int(os.getenv("LOG_WRITER_BATCH_SIZE", "500"))
+LOG_WRITER_FLUSH_MS = float(os.getenv("LOG_WRITER_FLUSH_MS", "20"))
+LOG_WRITER_QUEUE_SIZE = int(os.getenv("LOG_WRITER_QUEUE_SIZE", "10000"))
+
+logger = logging.getLogger(__name__)
+
+_Item = Tuple[Dict[str, Any], asyncio.Future]
+
+
+class LogWriter:
+    """
+    Buffers log rows and writes them as multi-row `INSERT ... RETURNING` batches.
+
+    A batch is flushed when it reaches `batch_size` rows or `flush_ms` after
+    its first row arrived, whichever comes first. Each caller awaits a future
+    resolved with its own row from the batch's RETURNING. When the queue is
+    full, `write` waits for room instead of growing memory.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = LOG_WRITER_BATCH_SIZE,
+        flush_ms: float = LOG_WRITER_FLUSH_MS,
+        queue_size: int = LOG_WRITER_QUEUE_SIZE,
+    ):
+        self._batch_size = batch_size
+        self._flush_seconds = flush_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.rows = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flushes everything already queued, then stops the writer."""
+        if self._task is None:
+            return
+
+        await self._queue.put(None)  # Sentinel: drain and exit
+        await self._task
+        self._task = None
+
+    async def write(self, row: Dict[str, Any]) -> LogResponse:
+        """Queues a log row and returns it once its batch is committed."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch: List[_Item] = [item]
+            deadline = loop.time() + self._flush_seconds
+
+            while len(batch) < self._batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_Item]) -> None:
+        rows = [row for row, _ in batch]
+
+        try:
+            async with async_session_maker() as db:
+                result = await db.scalars(
+                    insert(Log).returning(Log, sort_by_parameter_order=True), rows
+                )
+                logs = [LogResponse.model_validate(log) for log in result.all()]
+                await db.commit()
+        except Exception as e:
+            logger.exception("Failed to write a batch of %d logs", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += len(logs)
+        for (_, future), log in zip(batch, logs):
+            if not future.done():
+                future.set_result(log)
+
+
+log_writer = LogWriter()
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import ColumnElement, String, cast, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import engine
+from db.schemas.user_schema import UserResponse
+
+load_dotenv()
+
+# How long an authenticated user is served from memory (0 disables the
+# cache), and how many users are kept per worker
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+# Postgres NOTIFY channel carrying the ids of changed users to every worker
+PRINCIPAL_CACHE_CHANNEL = "principal_invalidation"
+PRINCIPAL_CACHE_RECONNECT_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """
+    TTL/LRU cache of authenticated users, keyed by token subject (user name).
+
+    Workers invalidate each other through Postgres LISTEN/NOTIFY: a change
+    to a user sends its id on `PRINCIPAL_CACHE_CHANNEL` from within the
+    changing transaction, so it is only delivered once committed. While the
+    listening connection is down the cache is bypassed, since invalidations
+    could be missed.
+    """
+
+    def __init__(
+        self,
+        ttl: float = PRINCIPAL_CACHE_TTL_SECONDS,
+        max_size: int = PRINCIPAL_CACHE_MAX_SIZE,
+    ):
+        self.ttl = ttl
+        self._max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, UserResponse]]" = OrderedDict()
+        self._subjects: Dict[int, str] = {}
+        # Bumped on every invalidation, so a lookup that raced one is not cached
+        self._generation = 0
+        self._listening = False
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self._listening
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, subject: str) -> Optional[UserResponse]:
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(subject)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, subject: str, user: UserResponse, generation: int) -> None:
+        """Caches a user loaded while the cache was at `generation`."""
+        if not self.enabled or generation != self._generation:
+            return
+
+        self._entries[subject] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(subject)
+        self._subjects[user.id] = subject
+
+        while len(self._entries) > self._max_size:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._subjects.pop(evicted.id, None)
+
+    def invalidate(self, user_id: int) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        subject = self._subjects.pop(user_id, None)
+        if subject is not None:
+            self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._subjects.clear()
+
+    @staticmethod
+    async def notify(user_id: int, db: AsyncSession) -> None:
+        """Queues an invalidation of `user_id`, sent when `db` commits."""
+        await db.execute(
+            text("SELECT pg_notify(:channel, :user_id)"),
+            {"channel": PRINCIPAL_CACHE_CHANNEL, "user_id": str(user_id)},
+        )
+
+    @staticmethod
+    def notify_expression(user_id: ColumnElement) -> ColumnElement:
+        """
+        `notify` as a SQL expression, to send it from the RETURNING clause of
+        the statement changing the user instead of a statement of its own.
+        """
+        return func.pg_notify(PRINCIPAL_CACHE_CHANNEL, cast(user_id, String))
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            self.invalidate(int(payload))
+        except ValueError:
+            self.clear()
+
+    async def start(self) -> None:
+        if self.ttl > 0 and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            raw = None
+            try:
+                raw = await engine.raw_connection()
+                connection = raw.driver_connection
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(PRINCIPAL_CACHE_CHANNEL, self._on_notify)
+
+                # Anything cached before now may have missed an invalidation
+                self.clear()
+                self._listening = True
+                await lost.wait()
+                logger.warning("Principal cache lost its NOTIFY connection")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Principal cache could not listen for invalidations")
+            finally:
+                self._listening = False
+                self.clear()
+                if raw is not None:
+                    try:
+                        raw.invalidate()
+                    except Exception:
+                        pass
+
+            await asyncio.sleep(PRINCIPAL_CACHE_RECONNECT_SECONDS)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+principal_cache = PrincipalCache()
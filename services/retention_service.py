@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import DateTime, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import async_session_maker
+from db.enums import LogStatus
+from db.models.event_model import Event
+from db.models.log_model import Log, LogArchive
+from db.models.retention_model import RetentionPolicy
+from db.schemas.retention_schema import (
+    RetentionPolicyResponse,
+    RetentionPolicyUpdate,
+    RetentionReport,
+)
+
+load_dotenv()
+
+# Opt-in: `/logs` and the log stats read the hot table only, so archived
+# logs drop out of them
+LOG_RETENTION_ENABLED = os.getenv("LOG_RETENTION_ENABLED", "false").lower() == "true"
+LOG_RETENTION_INTERVAL_SECONDS = float(os.getenv("LOG_RETENTION_INTERVAL_SECONDS", "3600"))
+# Global policy, overridable per user through `retention_policies`
+LOG_ARCHIVE_AFTER_DAYS = int(os.getenv("LOG_ARCHIVE_AFTER_DAYS", "7"))
+LOG_DELETE_AFTER_DAYS = int(os.getenv("LOG_DELETE_AFTER_DAYS", "90"))
+# Rows moved per transaction; keeps row locks short-lived
+LOG_RETENTION_CHUNK_SIZE = int(os.getenv("LOG_RETENTION_CHUNK_SIZE", "5000"))
+
+logger = logging.getLogger(__name__)
+
+
+def _cutoff(policy_days, default_days: int, now: datetime):
+    """SQL expression for `now` minus the user's (or the global) number of days."""
+    return literal(now, DateTime) - func.make_interval(
+        0, 0, 0, func.coalesce(policy_days, default_days)
+    )
+
+
+def _horizon(policy_days, default_days: int, now: datetime):
+    """
+    SQL expression for `now` minus the shortest retention in force: nothing
+    newer can be due. Unlike the per-row cutoff, the planner can use it as a
+    range on the timestamp index.
+    """
+    shortest = select(func.min(policy_days)).correlate(None).scalar_subquery()
+    return literal(now, DateTime) - func.make_interval(
+        0, 0, 0, func.least(shortest, default_days)
+    )
+
+
+class RetentionService:
+
+    @staticmethod
+    async def archive_chunk(db: AsyncSession, now: datetime) -> int:
+        """Moves one chunk of expired logs from `logs` to `logs_archive`."""
+        due = (
+            select(Log.id)
+            .join(Event, Event.id == Log.event_id)
+            .outerjoin(RetentionPolicy, RetentionPolicy.user_id == Event.creator_id)
+            .where(
+                Log.timestamp
+                < _horizon(RetentionPolicy.archive_after_days, LOG_ARCHIVE_AFTER_DAYS, now),
+                Log.timestamp
+                < _cutoff(RetentionPolicy.archive_after_days, LOG_ARCHIVE_AFTER_DAYS, now),
+            )
+            .order_by(Log.timestamp, Log.id)
+            .limit(LOG_RETENTION_CHUNK_SIZE)
+            .with_for_update(of=Log, skip_locked=True)
+        )
+
+        # DELETE ... RETURNING feeds the INSERT directly, one statement per chunk
+        moved = (
+            Log.__table__.delete()
+            .where(Log.id.in_(due.scalar_subquery()))
+            .returning(*Log.__table__.columns)
+            .cte("moved")
+        )
+        columns = [column.name for column in LogArchive.__table__.columns]
+        rows = select(
+            *(
+                (
+                    literal(LogStatus.ARCHIVED, LogArchive.status.type).label(name)
+                    if name == "status"
+                    else moved.c[name]
+                )
+                for name in columns
+            )
+        )
+
+        result = await db.execute(LogArchive.__table__.insert().from_select(columns, rows))
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    async def purge_chunk(db: AsyncSession, now: datetime) -> int:
+        """Deletes one chunk of archived logs past their deletion age."""
+        due = (
+            select(LogArchive.id)
+            .join(Event, Event.id == LogArchive.event_id)
+            .outerjoin(RetentionPolicy, RetentionPolicy.user_id == Event.creator_id)
+            .where(
+                LogArchive.timestamp
+                < _horizon(RetentionPolicy.delete_after_days, LOG_DELETE_AFTER_DAYS, now),
+                LogArchive.timestamp
+                < _cutoff(RetentionPolicy.delete_after_days, LOG_DELETE_AFTER_DAYS, now),
+            )
+            .order_by(LogArchive.timestamp, LogArchive.id)
+            .limit(LOG_RETENTION_CHUNK_SIZE)
+            .with_for_update(of=LogArchive, skip_locked=True)
+        )
+
+        result = await db.execute(
+            LogArchive.__table__.delete().where(LogArchive.id.in_(due.scalar_subquery()))
+        )
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    async def run(db: AsyncSession) -> RetentionReport:
+        """Archives and purges logs chunk by chunk until nothing is due."""
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+
+        archived = deleted = 0
+        while True:
+            moved = await RetentionService.archive_chunk(db, started_at)
+            archived += moved
+            if moved < LOG_RETENTION_CHUNK_SIZE:
+                break
+
+        while True:
+            purged = await RetentionService.purge_chunk(db, started_at)
+            deleted += purged
+            if purged < LOG_RETENTION_CHUNK_SIZE:
+                break
+
+        duration = time.perf_counter() - start
+        # Live-row estimate from the statistics collector; an exact COUNT(*)
+        # would scan the whole hot table
+        hot_rows = await db.scalar(
+            text(
+                "SELECT n_live_tup FROM pg_stat_user_tables "
+                "WHERE relid = CAST(:table AS regclass)"
+            ),
+            {"table": Log.__tablename__},
+        )
+
+        return RetentionReport(
+            started_at=started_at,
+            duration_seconds=duration,
+            archived=archived,
+            deleted=deleted,
+            rows_per_second=(archived + deleted) / duration if duration else 0.0,
+            hot_table_rows=int(hot_rows or 0),
+            hot_table_bytes=await db.scalar(
+                select(func.pg_total_relation_size(Log.__tablename__))
+            ),
+            archive_table_bytes=await db.scalar(
+                select(func.pg_total_relation_size(LogArchive.__tablename__))
+            ),
+        )
+
+    @staticmethod
+    async def get_policy(user_id: int, db: AsyncSession) -> RetentionPolicyResponse:
+        """Returns the user's retention policy, or the global one if none is set."""
+        policy = await db.get(RetentionPolicy, user_id)
+        if policy:
+            return RetentionPolicyResponse.model_validate(policy)
+
+        return RetentionPolicyResponse(
+            archive_after_days=LOG_ARCHIVE_AFTER_DAYS,
+            delete_after_days=LOG_DELETE_AFTER_DAYS,
+        )
+
+    @staticmethod
+    async def set_policy(
+        user_id: int, policy: RetentionPolicyUpdate, db: AsyncSession
+    ) -> RetentionPolicyResponse:
+        """Creates or replaces the user's retention policy."""
+        result = await db.execute(
+            insert(RetentionPolicy)
+            .values(user_id=user_id, **policy.model_dump())
+            .on_conflict_do_update(
+                index_elements=[RetentionPolicy.user_id], set_=policy.model_dump()
+            )
+            .returning(RetentionPolicy)
+        )
+        saved = RetentionPolicyResponse.model_validate(result.scalar_one())
+        await db.commit()
+        return saved
+
+    @staticmethod
+    async def delete_policy(user_id: int, db: AsyncSession) -> RetentionPolicyResponse:
+        """Drops the user's policy so the global one applies again."""
+        policy = await db.get(RetentionPolicy, user_id)
+        if policy:
+            await db.delete(policy)
+            await db.commit()
+
+        return await RetentionService.get_policy(user_id, db)
+
+
+class RetentionWorker:
+    """Background task applying the retention policies periodically."""
+
+    def __init__(self, interval: float = LOG_RETENTION_INTERVAL_SECONDS):
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.last_report: Optional[RetentionReport] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> RetentionReport:
+        async with async_session_maker() as db:
+            self.last_report = await RetentionService.run(db)
+
+        logger.info(
+            "Retention archived %d and deleted %d logs (%.0f rows/s)",
+            self.last_report.archived,
+            self.last_report.deleted,
+            self.last_report.rows_per_second,
+        )
+        return self.last_report
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Log retention run failed")
+            await asyncio.sleep(self._interval)
+
+
+retention_worker = RetentionWorker()
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import async_session_maker
+from db.enums import RollupGranularity
+from db.models.log_model import Log
+from db.models.log_rollup_model import LATENCY_BUCKETS_MS, LogRollup, LogRollupState
+from db.schemas.log_schema import LogStatsBucket, LogStatsResponse
+
+load_dotenv()
+
+LOG_ROLLUP_ENABLED = os.getenv("LOG_ROLLUP_ENABLED", "true").lower() == "true"
+LOG_ROLLUP_INTERVAL_SECONDS = float(os.getenv("LOG_ROLLUP_INTERVAL_SECONDS", "5"))
+LOG_ROLLUP_BATCH_SIZE = int(os.getenv("LOG_ROLLUP_BATCH_SIZE", "10000"))
+# Logs younger than this are left for the next run, so a transaction that
+# committed a lower id late is not skipped by the watermark
+LOG_ROLLUP_GRACE_SECONDS = float(os.getenv("LOG_ROLLUP_GRACE_SECONDS", "30"))
+
+# Advisory lock key so only one node compacts at a time
+ROLLUP_LOCK_KEY = 7_001_001
+
+COUNTERS = ("total", "count_2xx", "count_3xx", "count_4xx", "count_5xx", "count_other")
+
+BUCKET_START: Dict[RollupGranularity, Callable[[datetime], datetime]] = {
+    RollupGranularity.MINUTE: lambda ts: ts.replace(second=0, microsecond=0),
+    RollupGranularity.HOUR: lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+    RollupGranularity.DAY: lambda ts: ts.replace(
+        hour=0, minute=0, second=0, microsecond=0
+    ),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _latency_bucket(duration_ms: float) -> int:
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if duration_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def _status_counter(status_code: int) -> str:
+    if 200 <= status_code < 600:
+        return f"count_{status_code // 100}xx"
+    return "count_other"
+
+
+def _percentile(
+    histogram: List[int], count: int, p: float, max_ms: Optional[float]
+) -> Optional[float]:
+    if not count:
+        return None
+
+    target = p * count
+    seen = 0
+    for bound, bucket_count in zip(LATENCY_BUCKETS_MS, histogram):
+        seen += bucket_count
+        if seen >= target:
+            return float(bound)
+    # The overflow bucket has no upper bound but the slowest request
+    return max_ms
+
+
+def _to_stats(rollup: Any, bucket_start: Optional[datetime]) -> LogStatsBucket:
+    histogram, max_ms = rollup.latency_histogram, rollup.latency_max_ms
+    return LogStatsBucket(
+        bucket_start=bucket_start,
+        total=rollup.total,
+        success_rate=rollup.count_2xx / rollup.total if rollup.total else 0.0,
+        count_2xx=rollup.count_2xx,
+        count_3xx=rollup.count_3xx,
+        count_4xx=rollup.count_4xx,
+        count_5xx=rollup.count_5xx,
+        count_other=rollup.count_other,
+        latency_avg_ms=(
+            rollup.latency_sum_ms / rollup.latency_count if rollup.latency_count else None
+        ),
+        latency_max_ms=max_ms,
+        latency_p50_ms=_percentile(histogram, rollup.latency_count, 0.50, max_ms),
+        latency_p95_ms=_percentile(histogram, rollup.latency_count, 0.95, max_ms),
+        latency_p99_ms=_percentile(histogram, rollup.latency_count, 0.99, max_ms),
+    )
+
+
+def _empty_rollup(event_id: int, granularity: RollupGranularity, start: datetime) -> dict:
+    return {
+        "event_id": event_id,
+        "granularity": granularity,
+        "bucket_start": start,
+        **{counter: 0 for counter in COUNTERS},
+        "latency_count": 0,
+        "latency_sum_ms": 0.0,
+        "latency_histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        "latency_max_ms": None,
+    }
+
+
+class RollupService:
+
+    @staticmethod
+    def aggregate(logs: List[Any]) -> List[dict]:
+        """Folds log rows into one rollup row per event, granularity and bucket."""
+        rollups: Dict[Tuple[int, RollupGranularity, datetime], dict] = {}
+
+        for log in logs:
+            counter = _status_counter(log.response_status_code)
+            latency_bucket = (
+                _latency_bucket(log.duration_ms) if log.duration_ms is not None else None
+            )
+
+            for granularity, bucket_start in BUCKET_START.items():
+                start = bucket_start(log.timestamp)
+                key = (log.event_id, granularity, start)
+                rollup = rollups.get(key)
+                if rollup is None:
+                    rollup = rollups[key] = _empty_rollup(log.event_id, granularity, start)
+
+                rollup["total"] += 1
+                rollup[counter] += 1
+                if latency_bucket is not None:
+                    rollup["latency_count"] += 1
+                    rollup["latency_sum_ms"] += log.duration_ms
+                    rollup["latency_histogram"][latency_bucket] += 1
+                    rollup["latency_max_ms"] = max(
+                        rollup["latency_max_ms"] or 0.0, log.duration_ms
+                    )
+
+        return list(rollups.values())
+
+    @staticmethod
+    async def compact(db: AsyncSession, batch_size: int = LOG_ROLLUP_BATCH_SIZE) -> int:
+        """
+        Folds the next batch of logs past the watermark into the rollups.
+
+        Returns the number of logs folded (0 when another node holds the lock).
+        """
+        locked = await db.scalar(select(func.pg_try_advisory_xact_lock(ROLLUP_LOCK_KEY)))
+        if not locked:
+            return 0
+
+        await db.execute(
+            insert(LogRollupState)
+            .values(id=1, last_log_id=0)
+            .on_conflict_do_nothing(index_elements=[LogRollupState.id])
+        )
+        watermark = await db.scalar(
+            select(LogRollupState.last_log_id).where(LogRollupState.id == 1)
+        )
+
+        result = await db.execute(
+            select(
+                Log.id,
+                Log.event_id,
+                Log.timestamp,
+                Log.response_status_code,
+                Log.duration_ms,
+            )
+            .where(Log.id > watermark)
+            .order_by(Log.id)
+            .limit(batch_size)
+        )
+        logs = result.all()
+
+        # Stop at the first log still inside the grace period
+        cutoff = datetime.utcnow() - timedelta(seconds=LOG_ROLLUP_GRACE_SECONDS)
+        for index, log in enumerate(logs):
+            if log.timestamp >= cutoff:
+                logs = logs[:index]
+                break
+
+        if not logs:
+            await db.commit()
+            return 0
+
+        upsert = insert(LogRollup)
+        excluded = upsert.excluded
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[
+                LogRollup.event_id,
+                LogRollup.granularity,
+                LogRollup.bucket_start,
+            ],
+            set_={
+                **{
+                    counter: getattr(LogRollup, counter) + getattr(excluded, counter)
+                    for counter in COUNTERS + ("latency_count", "latency_sum_ms")
+                },
+                # Element-wise sum of the two histograms
+                "latency_histogram": literal_column(
+                    "(SELECT array_agg(a + b ORDER BY i) FROM unnest("
+                    "log_rollups.latency_histogram, excluded.latency_histogram"
+                    ") WITH ORDINALITY AS t(a, b, i))"
+                ),
+                # greatest() skips the NULL of buckets folded before 0011
+                "latency_max_ms": func.greatest(
+                    LogRollup.latency_max_ms, excluded.latency_max_ms
+                ),
+            },
+        )
+        await db.execute(upsert, RollupService.aggregate(logs))
+
+        await db.execute(
+            LogRollupState.__table__.update()
+            .where(LogRollupState.id == 1)
+            .values(last_log_id=logs[-1].id)
+        )
+        await db.commit()
+        return len(logs)
+
+    @staticmethod
+    async def get_event_stats(
+        event_id: int,
+        granularity: RollupGranularity,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        limit: int,
+        db: AsyncSession,
+    ) -> LogStatsResponse:
+        """Fetches the newest `limit` rollup buckets of an event, oldest first."""
+
+        query = select(LogRollup).where(
+            LogRollup.event_id == event_id, LogRollup.granularity == granularity
+        )
+        if since:
+            query = query.where(LogRollup.bucket_start >= BUCKET_START[granularity](since))
+        if until:
+            query = query.where(LogRollup.bucket_start < until)
+
+        result = await db.execute(
+            query.order_by(LogRollup.bucket_start.desc()).limit(limit)
+        )
+        rollups = list(reversed(result.scalars().all()))
+
+        summary = _empty_rollup(event_id, granularity, datetime.min)
+        for rollup in rollups:
+            for field in COUNTERS + ("latency_count", "latency_sum_ms"):
+                summary[field] += getattr(rollup, field)
+            for index, bucket_count in enumerate(rollup.latency_histogram):
+                summary["latency_histogram"][index] += bucket_count
+            if rollup.latency_max_ms is not None:
+                summary["latency_max_ms"] = max(
+                    summary["latency_max_ms"] or 0.0, rollup.latency_max_ms
+                )
+
+        return LogStatsResponse(
+            event_id=event_id,
+            granularity=granularity,
+            summary=_to_stats(SimpleNamespace(**summary), None),
+            buckets=[_to_stats(rollup, rollup.bucket_start) for rollup in rollups],
+        )
+
+
+class RollupCompactor:
+    """Background task that keeps the rollups up to date."""
+
+    def __init__(self, interval: float = LOG_ROLLUP_INTERVAL_SECONDS):
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            folded = 0
+            try:
+                async with async_session_maker() as db:
+                    folded = await RollupService.compact(db)
+            except Exception:
+                logger.exception("Log rollup compaction failed")
+
+            # A full batch means there is a backlog, keep going
+            if folded < LOG_ROLLUP_BATCH_SIZE:
+                await asyncio.sleep(self._interval)
+
+
+rollup_compactor = RollupCompactor()
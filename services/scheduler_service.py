@@ -0,0 +1,515 @@
+import asyncio
+import heapq
+import logging
+import os
+import socket
+import uuid
+from collections import deque
+from datetime import datetime, time, timedelta
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import DateTime, bindparam, case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import async_session_maker
+from db.enums import EventType, MethodType
+from db.models.event_model import Event
+from services.dispatch_service import DispatchService
+
+load_dotenv()
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+# "leased" claims due rows from Postgres so several nodes (and workers of one
+# node) can share the work, "local" keeps due times in an in-memory heap and
+# is only safe in a single process: every worker would fire every event
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "leased").lower()
+SCHEDULER_NODE_ID = os.getenv(
+    "SCHEDULER_NODE_ID", f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+)
+# Upper bound on events being dispatched at the same time
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "200"))
+# Leased mode: rows claimed per query, lease length and idle poll interval
+SCHEDULER_CLAIM_BATCH = int(os.getenv("SCHEDULER_CLAIM_BATCH", "100"))
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "60"))
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "1.0"))
+# Number of recent lag samples used for percentiles
+LAG_WINDOW = 2048
+
+logger = logging.getLogger(__name__)
+
+
+def next_fire_time(
+    event_type: EventType,
+    interval_minutes: Optional[int],
+    fixed_time: Optional[time],
+    anchor: Optional[datetime],
+    after: datetime,
+) -> Optional[datetime]:
+    """
+    Computes the first fire time of a recurring event strictly after `after`.
+
+    INTERVAL events fire every `interval_minutes` counted from `anchor` (the
+    creation time), FIXED_TIME events fire daily at `fixed_time` (UTC).
+    ONE_TIME events have no recurrence and return None.
+    """
+    if event_type == EventType.INTERVAL and interval_minutes:
+        interval = timedelta(minutes=interval_minutes)
+        anchor = anchor or after
+        if anchor > after:
+            return anchor
+        periods = (after - anchor) // interval + 1
+        return anchor + periods * interval
+
+    if event_type == EventType.FIXED_TIME and fixed_time:
+        candidate = datetime.combine(after.date(), fixed_time)
+        if candidate <= after:
+            candidate += timedelta(days=1)
+        return candidate
+
+    return None
+
+
+def first_run_at(
+    event_type: EventType,
+    interval_minutes: Optional[int],
+    fixed_time: Optional[time],
+    anchor: Optional[datetime],
+    now: datetime,
+) -> Optional[datetime]:
+    """Computes `next_run_at` for a newly created or rescheduled event."""
+    if event_type == EventType.ONE_TIME:
+        return now
+    return next_fire_time(event_type, interval_minutes, fixed_time, anchor, now)
+
+
+def rescheduled_run_at(
+    event_type: EventType,
+    interval_minutes: Optional[int],
+    fixed_time: Optional[time],
+    now: datetime,
+) -> Any:
+    """
+    `next_run_at` of an edited event, as an expression over the row being
+    updated so the UPDATE needs no prior read: `first_run_at` anchored on the
+    row's `created_at`, except that a pending ONE_TIME event keeps its due
+    time and a fired one is not re-armed.
+    """
+    if event_type == EventType.ONE_TIME:
+        return case(
+            (Event.event_type == EventType.ONE_TIME, Event.next_run_at), else_=now
+        )
+
+    if event_type == EventType.INTERVAL and interval_minutes:
+        # next_fire_time's arithmetic, in SQL
+        anchor = func.coalesce(Event.created_at, now)
+        interval = timedelta(minutes=interval_minutes)
+        periods = func.floor(
+            func.extract("epoch", now - anchor) / interval.total_seconds()
+        ) + 1
+        return case((anchor > now, anchor), else_=anchor + periods * interval)
+
+    return next_fire_time(event_type, interval_minutes, fixed_time, None, now)
+
+
+class ScheduledEvent:
+    """In-memory snapshot of the event fields needed to fire it."""
+
+    __slots__ = (
+        "id",
+        "event_type",
+        "destination",
+        "method_type",
+        "payload",
+        "interval_minutes",
+        "fixed_time",
+        "max_retries",
+        "retry_backoff_seconds",
+        "timeout_seconds",
+        "max_in_flight",
+        "rate_limit_per_second",
+        "created_at",
+        "due",
+        "seq",
+    )
+
+    def __init__(self, event: Any):
+        self.id: int = event.id
+        self.event_type: EventType = event.event_type
+        self.destination: str = event.destination
+        self.method_type: MethodType = event.method_type
+        self.payload: Optional[str] = event.payload
+        self.interval_minutes: Optional[int] = event.interval_minutes
+        self.fixed_time: Optional[time] = event.fixed_time
+        self.max_retries: int = event.max_retries
+        self.retry_backoff_seconds: float = event.retry_backoff_seconds
+        self.timeout_seconds: Optional[float] = event.timeout_seconds
+        self.max_in_flight: Optional[int] = event.max_in_flight
+        self.rate_limit_per_second: Optional[float] = event.rate_limit_per_second
+        self.created_at: Optional[datetime] = event.created_at
+        self.due: Optional[datetime] = event.next_run_at
+        self.seq: int = 0
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        return next_fire_time(
+            self.event_type,
+            self.interval_minutes,
+            self.fixed_time,
+            self.created_at,
+            after,
+        )
+
+
+SCHEDULED_COLUMNS = (
+    Event.id,
+    Event.event_type,
+    Event.destination,
+    Event.method_type,
+    Event.payload,
+    Event.interval_minutes,
+    Event.fixed_time,
+    Event.max_retries,
+    Event.retry_backoff_seconds,
+    Event.timeout_seconds,
+    Event.max_in_flight,
+    Event.rate_limit_per_second,
+    Event.created_at,
+    Event.next_run_at,
+)
+
+
+class LagStats:
+    """Tracks how late events fire compared to their due time."""
+
+    def __init__(self):
+        self.fired = 0
+        self.failed = 0
+        self.last = 0.0
+        self.max = 0.0
+        self._window: deque = deque(maxlen=LAG_WINDOW)
+
+    def record(self, lag_seconds: float) -> None:
+        self.fired += 1
+        self.last = lag_seconds
+        self.max = max(self.max, lag_seconds)
+        self._window.append(lag_seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        samples = sorted(self._window)
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "fired": self.fired,
+            "failed": self.failed,
+            "lag_last_seconds": self.last,
+            "lag_max_seconds": self.max,
+            "lag_p50_seconds": percentile(0.50),
+            "lag_p95_seconds": percentile(0.95),
+            "lag_p99_seconds": percentile(0.99),
+        }
+
+
+class Scheduler:
+    """
+    Fires events when their persisted `next_run_at` comes due.
+
+    In "local" mode due times are kept in a min-heap, loaded once at startup
+    and kept up to date by `EventService` on create/update/delete, so finding
+    due events never touches the database. Heap entries are invalidated
+    lazily: an entry whose `seq` no longer matches the scheduled event is
+    skipped.
+
+    In "leased" mode every node claims batches of due rows with
+    `SELECT ... FOR UPDATE SKIP LOCKED` and stamps them with a lease, so
+    replicas split the work without firing an event twice. If a node dies,
+    its leased rows become claimable again once the lease expires.
+    """
+
+    def __init__(
+        self,
+        mode: str = SCHEDULER_MODE,
+        node_id: str = SCHEDULER_NODE_ID,
+        max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+    ):
+        if mode not in ("local", "leased"):
+            raise ValueError(f"Unknown scheduler mode: {mode}")
+
+        self.mode = mode
+        self.node_id = node_id
+        self._max_concurrency = max_concurrency
+        self._heap: List[Tuple[datetime, int, int]] = []
+        self._events: Dict[int, ScheduledEvent] = {}
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+        self.lag = LagStats()
+
+        # Built once: constructing the statement per fire costs more than running it
+        complete = update(Event).where(Event.id == bindparam("event_id"))
+        if mode == "leased":
+            complete = complete.where(Event.lease_owner == bindparam("node"))
+        self._complete_query = complete.values(
+            next_run_at=case(
+                (Event.next_run_at == bindparam("due"), bindparam("next_run", type_=DateTime)),
+                else_=Event.next_run_at,
+            ),
+            lease_owner=None,
+            lease_expires_at=None,
+            updated_at=Event.updated_at,  # Firing is not a definition change
+        ).execution_options(synchronize_session=False)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def start(self) -> None:
+        """Loads the schedulable events (local mode) and starts the firing loop."""
+        if self.running:
+            return
+
+        if self.mode == "local":
+            # Worker count read by uvicorn and gunicorn when not given on the command line
+            if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+                raise RuntimeError(
+                    "SCHEDULER_MODE=local fires each event once per worker, "
+                    "use SCHEDULER_MODE=leased with several workers"
+                )
+            await self._load()
+            self._task = asyncio.create_task(self._run_local())
+        else:
+            self._task = asyncio.create_task(self._run_leased())
+        logger.info("Scheduler started in %s mode as %s", self.mode, self.node_id)
+
+    async def stop(self) -> None:
+        """Stops the firing loop and waits for in-flight dispatches."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def schedule(self, event: Any) -> None:
+        """Adds or replaces the schedule entry of a created or updated event."""
+        if event.next_run_at is None:
+            self.unschedule(event.id)
+            return
+
+        if self.mode == "local":
+            self._push(ScheduledEvent(event))
+        elif event.next_run_at <= datetime.utcnow():
+            self._wakeup.set()
+
+    def unschedule(self, event_id: int) -> None:
+        """Removes an event from the schedule."""
+        self._events.pop(event_id, None)
+
+    # Local mode
+
+    async def _load(self) -> None:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(*SCHEDULED_COLUMNS).where(Event.next_run_at.isnot(None))
+            )
+            for row in result:
+                self._push(ScheduledEvent(row))
+
+    def _push(self, entry: ScheduledEvent) -> None:
+        self._seq += 1
+        entry.seq = self._seq
+        self._events[entry.id] = entry
+        heapq.heappush(self._heap, (entry.due, entry.seq, entry.id))
+
+        # Wake the loop if the new entry is due before what it is sleeping on
+        if self._heap[0][1] == entry.seq:
+            self._wakeup.set()
+
+    def _peek(self) -> Optional[ScheduledEvent]:
+        """Returns the earliest scheduled event, dropping stale heap entries."""
+        while self._heap:
+            _, seq, event_id = self._heap[0]
+            entry = self._events.get(event_id)
+            if entry is not None and entry.seq == seq:
+                return entry
+            heapq.heappop(self._heap)
+        return None
+
+    async def _run_local(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = datetime.utcnow()
+
+            entry = self._peek()
+            while entry is not None and entry.due <= now:
+                heapq.heappop(self._heap)
+                due = entry.due
+
+                # Fire times are anchored, so missed slots are skipped, not replayed
+                next_run = entry.next_after(now)
+                if next_run is None:
+                    del self._events[entry.id]
+                else:
+                    entry.due = next_run
+                    self._push(entry)
+
+                self._spawn(entry, due, next_run)
+                entry = self._peek()
+
+            timeout = None
+            if entry is not None:
+                timeout = max(0.0, (entry.due - datetime.utcnow()).total_seconds())
+            await self._sleep(timeout)
+
+    # Leased mode
+
+    async def _claim(self, limit: int) -> List[ScheduledEvent]:
+        """Leases up to `limit` due events that no live node holds."""
+        now = datetime.utcnow()
+
+        due_ids = (
+            select(Event.id)
+            .where(
+                Event.next_run_at <= now,
+                (Event.lease_expires_at.is_(None)) | (Event.lease_expires_at < now),
+            )
+            .order_by(Event.next_run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+
+        async with async_session_maker() as db:
+            result = await db.execute(
+                update(Event)
+                .where(Event.id.in_(due_ids.scalar_subquery()))
+                .values(
+                    lease_owner=self.node_id,
+                    lease_expires_at=now + timedelta(seconds=SCHEDULER_LEASE_SECONDS),
+                    updated_at=Event.updated_at,
+                )
+                .returning(*SCHEDULED_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            claimed = [ScheduledEvent(row) for row in result]
+            await db.commit()
+
+        return claimed
+
+    async def _run_leased(self) -> None:
+        while True:
+            self._wakeup.clear()
+            capacity = self._max_concurrency - len(self._inflight)
+            limit = min(SCHEDULER_CLAIM_BATCH, capacity)
+
+            claimed: List[ScheduledEvent] = []
+            if limit > 0:
+                try:
+                    claimed = await self._claim(limit)
+                except Exception:
+                    logger.exception("Claiming due events failed")
+
+            now = datetime.utcnow()
+            # Retries, and waits in a destination host's queue, stop well
+            # before the lease lapses and another node could claim the event
+            # again
+            deadline = monotonic() + SCHEDULER_LEASE_SECONDS / 2
+            for entry in claimed:
+                self._spawn(entry, entry.due, entry.next_after(now), deadline)
+
+            # A full batch means more work is probably waiting
+            if limit > 0 and len(claimed) == limit:
+                await asyncio.sleep(0)
+            else:
+                await self._sleep(SCHEDULER_POLL_SECONDS)
+
+    # Firing
+
+    async def _sleep(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _spawn(
+        self,
+        entry: ScheduledEvent,
+        due: datetime,
+        next_run: Optional[datetime],
+        deadline: Optional[float] = None,
+    ) -> None:
+        task = asyncio.create_task(self._fire(entry, due, next_run, deadline))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _fire(
+        self,
+        entry: ScheduledEvent,
+        due: datetime,
+        next_run: Optional[datetime],
+        deadline: Optional[float] = None,
+    ) -> None:
+        try:
+            async with async_session_maker() as db:
+                self.lag.record((datetime.utcnow() - due).total_seconds())
+                attempt = 1
+                while True:
+                    # Slots are held only while a request runs, not while it
+                    # waits for its host's limits or backs off, so a slow or
+                    # failing destination does not starve the others
+                    _, delay = await DispatchService.attempt(
+                        entry, attempt, db, deadline, self._semaphore
+                    )
+                    if delay is None:
+                        break
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                await self._complete(entry.id, due, next_run, db)
+        except Exception:
+            self.lag.failed += 1
+            logger.exception("Scheduled dispatch of event %s failed", entry.id)
+
+    async def _complete(
+        self,
+        event_id: int,
+        due: datetime,
+        next_run: Optional[datetime],
+        db: AsyncSession,
+    ) -> None:
+        """Advances `next_run_at` unless the event was rescheduled meanwhile."""
+        await db.execute(
+            self._complete_query,
+            {"event_id": event_id, "due": due, "next_run": next_run, "node": self.node_id},
+        )
+        await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the scheduler state along with its firing lag."""
+        stats: Dict[str, Any] = {
+            "mode": self.mode,
+            "node_id": self.node_id,
+            "running": self.running,
+            "in_flight": self.in_flight,
+        }
+        if self.mode == "local":
+            entry = self._peek()
+            stats["scheduled_events"] = len(self._events)
+            stats["next_due"] = entry.due if entry is not None else None
+
+        return {**stats, **self.lag.snapshot()}
+
+
+scheduler = Scheduler()
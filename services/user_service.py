@@ -1,23 +1,95 @@
-from typing import List
+import base64
+import os
+from typing import Any, Dict, NoReturn, Optional
 
+from dotenv import load_dotenv
 from fastapi import HTTPException
 from passlib.context import CryptContext
-from sqlalchemy import select, update
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import jwt_utils
+import serialization
 from db.models.user_model import User
 from db.schemas.user_schema import UserResponse, UserUpdate
+from services.principal_cache import PrincipalCache, principal_cache
+
+load_dotenv()
+
+USERS_PAGE_SIZE = int(os.getenv("USERS_PAGE_SIZE", "100"))
+
+# Only the columns of UserResponse; the password hash is never loaded
+USER_RESPONSE_COLUMNS = serialization.schema_columns(User, UserResponse)
+SEARCHED_COLUMNS = (User.user_name, User.name, User.email)
+# Unique constraints of `users` and the errors their violations are reported as
+UNIQUE_VIOLATIONS = {
+    "users_email_key": "A user with this email already exists.",
+    "users_user_name_key": "This username is already taken.",
+}
+
+
+def raise_unique_violation(error: IntegrityError) -> NoReturn:
+    """Reports a duplicate email or user name as a 400, re-raises anything else."""
+    # asyncpg's UniqueViolationError, wrapped by the DBAPI adapter
+    constraint = getattr(error.orig.__cause__, "constraint_name", None)
+    if constraint in UNIQUE_VIOLATIONS:
+        raise HTTPException(status_code=400, detail=UNIQUE_VIOLATIONS[constraint])
+    raise error
+
+
+def _prefix_pattern(term: str) -> str:
+    """Lowercased LIKE prefix pattern of a search term, its wildcards escaped."""
+    escaped = term.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
 
 
 class UserService:
 
     @staticmethod
-    async def get_all_users(db: AsyncSession) -> List[UserResponse]:
-        """Fetch all users from the database."""
-        result = await db.execute(select(User))
-        users = result.scalars().all()
-        return [UserResponse.model_validate(user) for user in users]
+    def _encode_cursor(user: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(str(user["id"]).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> int:
+        try:
+            return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    @staticmethod
+    async def get_all_users(
+        db: AsyncSession,
+        limit: int = USERS_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        q: Optional[str] = None,
+    ) -> serialization.RowsPage:
+        """
+        Fetch a page of users by id as plain rows, optionally only those whose
+        user name, name or email starts with `q` (case-insensitive).
+
+        Keyset-paginated, so every page costs the same however deep it is. The
+        search is served by the lower(...) text_pattern_ops indexes of 0009.
+        """
+        query = select(*USER_RESPONSE_COLUMNS)
+        if cursor:
+            query = query.where(User.id > UserService._decode_cursor(cursor))
+        if q:
+            pattern = _prefix_pattern(q)
+            query = query.where(
+                or_(*(func.lower(column).like(pattern) for column in SEARCHED_COLUMNS))
+            )
+
+        # Fetch one extra row to know whether another page exists
+        result = await db.execute(query.order_by(User.id).limit(limit + 1))
+        users = serialization.as_dicts(result)
+
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = UserService._encode_cursor(users[-1])
+
+        return serialization.RowsPage(users, next_cursor)
 
     @staticmethod
     async def get_user(user_id: int, db: AsyncSession) -> UserResponse:
@@ -35,7 +107,6 @@ class UserService:
 
         # Converts Pydantic model to a dictionary (excluding unset fields)
         update_data = update_user_data.model_dump(exclude_unset=True)
-        print(update_data)
 
         # Ensuring we have fields to update
         if not update_data:
@@ -43,52 +114,35 @@ class UserService:
                 status_code=400, detail="No fields provided for update."
             )
 
-        # Checking if user is found (scenarios where the user deleted their profile)
-        user = await db.get(User, user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Check for unique email
-        if "email" in update_data:
-            existing_email = await db.execute(
-                select(User).where(
-                    User.email == update_data["email"], User.id != user_id
-                )
-            )
-            if existing_email.scalars().first():
-                raise HTTPException(
-                    status_code=400, detail="A user with this email already exists."
-                )
-
-        # Check for unique username
-        if "user_name" in update_data:
-            existing_username = await db.execute(
-                select(User).where(
-                    User.user_name == update_data["user_name"], User.id != user_id
-                )
-            )
-            if existing_username.scalars().first():
-                raise HTTPException(
-                    status_code=400, detail="This username is already taken."
-                )
-
         # Hash password if it's being updated
         if "password" in update_data:
-            update_data["password"] = jwt_utils.get_password_hash(
+            update_data["password"] = await jwt_utils.hash_password(
                 update_data["password"]
             )
 
-        # Perform bulk update using SQLAlchemy's `update()`
-        await db.execute(update(User).where(User.id == user_id).values(**update_data))
-
-        await db.commit()
-        await db.refresh(user)
-
-        # Fetch the updated user
-        updated_user_data = await db.execute(select(User).where(User.id == user_id))
-        updated_user_data = updated_user_data.scalars().first()
+        # One UPDATE ... RETURNING: the unique constraints catch a taken email or
+        # user name, and other workers drop their cached copy once it commits
+        try:
+            result = await db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(**update_data)
+                .returning(
+                    *USER_RESPONSE_COLUMNS, PrincipalCache.notify_expression(User.id)
+                )
+            )
+            updated_user = result.first()
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise_unique_violation(e)
+
+        # Scenarios where the user deleted their profile
+        if updated_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
 
-        return UserResponse.model_validate(updated_user_data)
+        principal_cache.invalidate(user_id)
+        return UserResponse.model_validate(updated_user)
 
     @staticmethod
     async def delete_user(user_id: int, db: AsyncSession) -> dict:
@@ -98,6 +152,8 @@ class UserService:
             raise HTTPException(status_code=404, detail="User not found")
 
         await db.delete(user)
+        await PrincipalCache.notify(user_id, db)
         await db.commit()
+        principal_cache.invalidate(user_id)
 
         return {"message": f"User {user_id} deleted successfully"}